@@ -0,0 +1,149 @@
+"""Memory-aware admission control for the worker pool of run_benchmarks.py.
+
+With --mem_reserve, run_benchmarks.py keeps that much memory available for
+the rest of the machine. A new benchmark only starts if the available memory,
+less what it and the running benchmarks are expected to still grow by, stays
+above the reserve. A benchmark is expected to reach the 90th percentile of the
+peak memory of the finished benchmarks of its solver (nothing before the
+first one finishes). If the available memory falls below the reserve anyway,
+the benchmark that started last is killed and queued again, so that the ones
+that are further along can finish; a benchmark is preempted at most
+MAX_PREEMPTIONS times. Every decision is logged as a [memory] line.
+
+The running tasks are found as the process trees of the pool workers whose
+command line is that of the task; a task without one yet (or on a checker
+server of --warm) is expected to grow by its whole expected peak.
+verit+sledgehammer batches count like other tasks, but only single
+benchmarks are preempted, and never one whose task has already finished.
+"""
+
+import os
+import signal
+import sys
+import time
+
+import psutil
+
+# Seconds between memory checks while benchmarks run
+POLL_INTERVAL = 2
+
+# Times a benchmark may be preempted before it is left to run
+MAX_PREEMPTIONS = 2
+
+# Quantile of the finished peaks a new benchmark of the solver is expected to reach
+PEAK_QUANTILE = 0.9
+
+def tree_rss_mb(proc):
+    """Resident memory of a process and its descendants, in MB."""
+    rss = 0
+    for p in [proc] + proc.children(recursive=True):
+        try:
+            rss += p.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return rss // (1024 * 1024)
+
+def log(message):
+    print(f"[memory] {message}", file=sys.stderr, flush=True)
+
+class AdmissionControl:
+    def __init__(self, reserve_mb, commands):
+        self.reserve_mb = reserve_mb
+        self.commands = commands  # Solver to the function giving the command of a task from its benchmarks
+        self.peaks = {}
+        self.preemptions = {}
+        self.held = None
+
+    def observe(self, solver, usage):
+        if usage.get("peak_rss_mb"):
+            self.peaks.setdefault(solver, []).append(usage["peak_rss_mb"])
+
+    def expected_mb(self, solver):
+        peaks = sorted(self.peaks.get(solver, []))
+        return peaks[int(PEAK_QUANTILE * (len(peaks) - 1))] if peaks else 0
+
+    def running(self, tasks):
+        """
+        Match the process trees of the pool workers to the running tasks, given
+        as (solver, benchmarks) pairs. Return (process, solver, benchmarks) for each.
+        """
+        wanted = {}
+        for solver, paths in tasks:
+            wanted[tuple(self.commands[solver](paths))] = (solver, paths)
+        matched = []
+        for worker in psutil.Process().children():
+            try:
+                roots = worker.children()
+            except psutil.NoSuchProcess:
+                continue
+            for root in roots:
+                try:
+                    cmdline = root.cmdline()
+                except psutil.NoSuchProcess:
+                    continue
+                for cmd, task in wanted.items():
+                    if tuple(cmdline[-len(cmd):]) == cmd:
+                        matched.append((root, *task))
+                        break
+        return matched
+
+    def admit(self, solver, tasks):
+        """Whether a benchmark of the solver may start next to the running tasks."""
+        available = psutil.virtual_memory().available // (1024 * 1024)
+        growth = 0
+        unmatched = set(tasks)
+        for proc, running_solver, paths in self.running(tasks):
+            unmatched.discard((running_solver, paths))
+            try:
+                growth += max(0, self.expected_mb(running_solver) - tree_rss_mb(proc))
+            except psutil.NoSuchProcess:
+                pass
+        growth += sum(self.expected_mb(running_solver) for running_solver, _ in unmatched)
+        need = self.expected_mb(solver) + growth
+        # With nothing running, waiting would not free any memory
+        if not tasks or available - need >= self.reserve_mb:
+            if self.held is not None:
+                log(f"admitting again: {available} MB available, {need} MB expected")
+                self.held = None
+            return True
+        if self.held != solver:
+            log(f"holding back {solver} with {len(tasks)} running: {available} MB available, "
+                f"{need} MB expected, {self.reserve_mb} MB reserved")
+            self.held = solver
+        return False
+
+    def relieve(self, tasks):
+        """
+        If the available memory is below the reserve, kill the single benchmark
+        that started last. tasks maps each running (solver, benchmarks) task to
+        its AsyncResult. Return the (solver, path) of the benchmark, or None.
+        """
+        available = psutil.virtual_memory().available // (1024 * 1024)
+        if available >= self.reserve_mb:
+            return None
+        # A finished task only waits for its result to be recorded
+        unfinished = [task for task, result in tasks.items() if not result.ready()]
+        if len(unfinished) < 2:
+            return None  # Never stop the only task
+        candidates = []
+        for proc, solver, paths in self.running(unfinished):
+            path = paths[0]
+            if len(paths) == 1 and self.preemptions.get((solver, path), 0) < MAX_PREEMPTIONS:
+                try:
+                    candidates.append((proc.create_time(), proc, solver, path))
+                except psutil.NoSuchProcess:
+                    pass
+        if not candidates:
+            return None
+        started, proc, solver, path = max(candidates, key=lambda candidate: candidate[0])
+        if tasks[(solver, (path,))].ready():
+            return None  # Finished while the process trees were searched
+        try:
+            rss = tree_rss_mb(proc)
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (psutil.NoSuchProcess, ProcessLookupError):
+            return None
+        self.preemptions[(solver, path)] = self.preemptions.get((solver, path), 0) + 1
+        log(f"preempted {solver} on {path} ({rss} MB, started {time.time() - started:.0f} s ago): "
+            f"{available} MB available, {self.reserve_mb} MB reserved; queued again")
+        return solver, path
@@ -1,51 +1,38 @@
-import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
-import glob
 import os
 import argparse
 
-def load_and_process_data(file_pattern, benchmark_filter=None):
+from results_index import cactus_bands, cactus_curves, index_runs
+from results_store import load_runs
+
+def load_and_process_data(file_pattern, benchmark_filter=None, logic=None, timeout=None):
     """
-    Load and process CSV files matching the file pattern.
-    Calculate total time (sum of relevant columns) for unsat results.
-    Optionally filter benchmarks within the data by a name prefix.
+    Load and process the runs whose CSV files match the file pattern.
+    Calculate the cumulative time (sum of relevant columns) of the unsat
+    results, fastest first, in seconds for each checker.
+    Optionally restrict the benchmarks to a logic or filter them by name, and
+    keep only the benchmarks done within a shorter virtual timeout.
+    Return the curves and the quartile bands of the runs made with --repeat.
     """
-    data_frames = []
-    for file in glob.glob(file_pattern):
-        df = pd.read_csv(file)
-
-        # Fill missing values with 0
-        df = df.fillna(0)
-
-        # Determine schema and calculate time accordingly
-        if 'check' in df.columns:
-            df['time'] = df['solve'] + df['check']
-        elif 'kernel' in df.columns:
-            df['time'] = df['solve'] + df['reconstruct'] + df['kernel']
-        else:
-            df['time'] = df['solve']
-
-        # Filter and sum times where result == 'unsat'
-        filtered = df[df['result'] == 'unsat']
-        if benchmark_filter:
-            filtered = filtered[filtered['benchmark'].str.contains(benchmark_filter)]
-
-        aggregated = filtered.groupby('benchmark')['time'].sum().reset_index()
-        aggregated['checker'] = file.split('/')[-1].split('.')[0]  # Use file name as checker ID
-        data_frames.append(aggregated)
-    return pd.concat(data_frames, ignore_index=True)
+    indexes = index_runs(load_runs(file_pattern))
+    column = "logic" if logic else None
+    return (cactus_curves(indexes, column, logic, benchmark_filter, timeout),
+            cactus_bands(indexes, column, logic, benchmark_filter, timeout))
 
-def generate_plot(data, output_file):
+def generate_plot(curves, output_file, bands=None):
     """
     Generate cumulative solve time vs. rules proved plot for multiple checkers.
+    Runs made with --repeat get a band between the quartiles of their times.
     Save the plot as a PDF to the specified output file.
     """
     plt.figure(figsize=(5, 3))
 
-    for checker, group in data.groupby('checker'):
-        group = group.sort_values('time').reset_index()
-        group['cumulative_time'] = group['time'].cumsum() / 1000  # Convert ms to seconds
-        plt.step(group.index + 1, group['cumulative_time'], label=checker, where='post')
+    for checker, cumulative_time in curves.items():
+        x = np.arange(1, len(cumulative_time) + 1)
+        line, = plt.step(x, cumulative_time, label=checker, where='post')
+        if bands and checker in bands:
+            plt.fill_between(x, *bands[checker], step='post', color=line.get_color(), alpha=0.25, linewidth=0)
 
     plt.title("Cumulative solving + checking time")
     plt.xlabel("Number of benchmarks")
@@ -67,11 +54,13 @@ if __name__ == "__main__":
     parser.add_argument("data_dir", type=str, help="Path to the directory containing data files.")
     parser.add_argument("output_file", type=str, help="Path to the output PDF file.")
     parser.add_argument("--benchmark_filter", type=str, default=None, help="Prefix to filter benchmarks within the data (e.g., QF_ for quantifier-free benchmarks).")
+    parser.add_argument("--logic", type=str, default=None, help="Only plot benchmarks of this SMT-LIB logic (e.g., QF_UF).")
+    parser.add_argument("--timeout", type=float, default=None, help="Virtual timeout in seconds, shorter than the one of the runs.")
     args = parser.parse_args()
 
     # Load and process the data
     file_pattern = os.path.join(args.data_dir, "*.csv")
-    processed_data = load_and_process_data(file_pattern, args.benchmark_filter)
+    processed_data, bands = load_and_process_data(file_pattern, args.benchmark_filter, args.logic, args.timeout)
 
     # Generate the plot
-    generate_plot(processed_data, args.output_file)
+    generate_plot(processed_data, args.output_file, bands)
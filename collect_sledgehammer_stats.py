@@ -1,5 +1,3 @@
-import os
-import csv
 import sys
 
 def parse_log_file(filepath):
@@ -51,31 +49,9 @@ def parse_log_file(filepath):
 
     return data
 
-def find_log_files(directory):
-    log_files = []
-    for root, _, files in os.walk(directory):
-        for file in files:
-            if file.endswith(".stdout"):
-                file = os.path.join(os.path.splitext(file)[0], "mirabelle/mirabelle.log")
-                log_files.append(os.path.join(root, file))
-    return log_files
-
-def write_to_csv(log_files, output_csv):
-    # Ensure parent directories of the CSV file exist
-    os.makedirs(os.path.dirname(output_csv), exist_ok=True)
-
-    fieldnames=["benchmark", "result", "holes", "solve", "check"]
-
-    # Write data to CSV
-    with open(output_csv, 'w', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-
-        for filepath in log_files:
-            data = parse_log_file(filepath)
-            writer.writerow(data)
-
 if __name__ == "__main__":
+    import collect_stats
+
     if len(sys.argv) != 3:
         print("Usage: python collect_sledgehammer_stats.py <output directory> <output_csv>")
         sys.exit(1)
@@ -83,7 +59,6 @@ if __name__ == "__main__":
     directory = sys.argv[1]
     output_csv = sys.argv[2]
 
-    log_files = find_log_files(directory)
-    write_to_csv(log_files, output_csv)
+    collect_stats.collect_csv("sledgehammer", directory, output_csv)
 
     print(f"Data has been written to {output_csv}")
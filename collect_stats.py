@@ -0,0 +1,257 @@
+"""Parse solver logs into CSVs with one parser plug-in per solver.
+
+The output tree is walked once with os.scandir, log files are parsed across a
+process pool, and with --incremental only the files whose size or mtime
+changed since the previous run are parsed again. The CSVs are identical to the
+ones the collect_*_stats.py scripts write.
+
+Output packed by run_benchmarks.py --output_store is read from
+<output>/<solver>.outputs.db (see output_store.py) as if it were the tree:
+each stored benchmark counts as the log file it would have there, and it
+replaces a file of the same benchmark left from a run without the store.
+
+Usage:
+  python3 collect_stats.py <output directory> <data directory>
+      Collect every <output>/<solver>/<suite> tree into <data>/<suite>/<solver>.csv.
+  python3 collect_stats.py --parser <name> <log directory> <output_csv>
+      Collect a single tree, like the collect_<name>_stats.py script.
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import collect_duper_stats
+import collect_ethos_stats
+import collect_leansmt_stats
+import collect_sledgehammer_stats
+import collect_smtcoq_stats
+from output_store import OutputStore, store_file
+
+# Parser plug-ins: parse function, CSV columns, the log file for a .stdout file
+# and the parse function for logs from the output store (None: never stored)
+PARSERS = {
+    "duper": (collect_duper_stats.parse_log_file, ["benchmark", "result", "holes", "solve"], None,
+              collect_duper_stats.parse_log),
+    "ethos": (collect_ethos_stats.parse_log_file, ["benchmark", "result", "holes", "solve", "check"], None,
+              collect_ethos_stats.parse_log),
+    "leansmt": (collect_leansmt_stats.parse_log_file,
+                ["benchmark", "result", "holes", "solve", "load", "reconstruct", "kernel"], None,
+                collect_leansmt_stats.parse_log),
+    "sledgehammer": (collect_sledgehammer_stats.parse_log_file, ["benchmark", "result", "holes", "solve", "check"],
+                     lambda path: os.path.join(path[:-len(".stdout")], "mirabelle/mirabelle.log"), None),
+    "smtcoq": (collect_smtcoq_stats.parse_log_file, ["benchmark", "result", "holes", "solve", "check"], None,
+               collect_smtcoq_stats.parse_log),
+}
+
+SOLVER_PARSERS = {
+    "duper": "duper",
+    "cvc5+leansmt-compiler": "leansmt",
+    "cvc5+leansmt+compiler": "leansmt",
+    "cvc5+ethos": "ethos",
+    "verit+sledgehammer": "sledgehammer",
+    "verit+smtcoq": "smtcoq",
+}
+
+# Columns of a row that are not timings
+LABEL_COLUMNS = ["benchmark", "result", "holes"]
+
+# Below this many files a process pool costs more than it saves
+MIN_PARALLEL_FILES = 256
+
+def find_log_files(directory, log_path=None):
+    """
+    List the .stdout files below directory in the order of os.walk, which
+    fixes the row order of the CSVs.
+    """
+    log_files = []
+    subdirs = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        subdirs.append(entry.path)
+                elif entry.name.endswith(".stdout"):
+                    log_files.append(log_path(entry.path) if log_path else entry.path)
+    except OSError:
+        return log_files
+    for subdir in subdirs:
+        log_files.extend(find_log_files(subdir, log_path))
+    return log_files
+
+def file_signature(filepath):
+    try:
+        st = os.stat(filepath)
+        return [st.st_mtime_ns, st.st_size]
+    except OSError:
+        return [0, -1]
+
+def quartiles(values):
+    if len(values) < 2:
+        return values[0], values[0]
+    q1, _, q3 = statistics.quantiles(values, n=4, method="inclusive")
+    return round(q1), round(q3)
+
+def parse_repeats(parse, phases, filepath):
+    """
+    Parse a log file and the logs of its repetitions (run_benchmarks.py
+    --repeat), <log>.rep2, <log>.rep3, ...
+    """
+    runs = [parse(filepath)]
+    while os.path.exists(f"{filepath}.rep{len(runs) + 1}"):
+        runs.append(parse(f"{filepath}.rep{len(runs) + 1}"))
+    return merge_repeats(runs, phases)
+
+# Output stores opened by this process
+STORES = {}
+
+def parse_stored(parse_log, phases, db_file, directory, prefix, filepath):
+    """Parse the stored runs of the benchmark whose log in the tree below directory would be filepath."""
+    store = STORES.setdefault(db_file, OutputStore(db_file))
+    name = prefix + os.path.relpath(filepath, directory)[:-len(".stdout")]
+    return merge_repeats([parse_log(filepath, io.TextIOWrapper(io.BytesIO(stdout)))
+                          for stdout, _ in store.get(name)], phases)
+
+def merge_repeats(runs, phases):
+    """
+    Merge the rows of the runs of a benchmark. The result and holes come from
+    the first run; every timing is the median over the runs that have it, and
+    the phases also get their quartiles as <phase>_q1 and <phase>_q3.
+    """
+    row = runs[0]
+    if len(runs) == 1:
+        return row
+
+    spread = {}
+    for column in [column for run in runs for column in run]:
+        if column in LABEL_COLUMNS or column in spread:
+            continue
+        values = sorted(int(run[column]) for run in runs if run.get(column, "") != "")
+        spread[column] = values
+        row[column] = round(statistics.median(values)) if values else ""
+    for phase in phases:
+        values = spread.get(phase)
+        row[f"{phase}_q1"], row[f"{phase}_q3"] = quartiles(values) if values else ("", "")
+    row["repeats"] = len(runs)
+    return row
+
+def parse_all(parse, log_files, jobs):
+    if jobs == 1 or len(log_files) < MIN_PARALLEL_FILES:
+        return [parse(filepath) for filepath in log_files]
+    with ProcessPoolExecutor(jobs) as pool:
+        return list(pool.map(parse, log_files, chunksize=max(1, len(log_files) // (jobs * 8))))
+
+def load_state(state_file):
+    try:
+        with open(state_file, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def find_store(directory):
+    """
+    Return the output store with the logs of directory, <output>/<solver>/<suite>,
+    and the prefix of their names in it, or (None, None).
+    """
+    solver_dir, suite = os.path.split(os.path.normpath(directory))
+    db_file = store_file(os.path.dirname(solver_dir), os.path.basename(solver_dir))
+    if not os.path.exists(db_file):
+        return None, None
+    return db_file, suite + "/"
+
+def collect_csv(parser, directory, output_csv, jobs=None, incremental=False):
+    """Parse the logs below directory and write them to output_csv. Return the number of files parsed."""
+    parse, fieldnames, log_path, parse_log = PARSERS[parser]
+    phases = [column for column in fieldnames if column not in LABEL_COLUMNS]
+    parse = partial(parse_repeats, parse, phases)
+    jobs = jobs or os.cpu_count()
+    log_files = find_log_files(directory, log_path)
+
+    # Stored logs, with the time they were stored as their signature
+    stored = {}
+    db_file, prefix = find_store(directory) if parse_log else (None, None)
+    if db_file:
+        stored = {os.path.join(directory, name[len(prefix):] + ".stdout"): [int(finished * 1e9), 0]
+                  for name, finished in OutputStore(db_file).index(prefix)}
+        log_files = [filepath for filepath in log_files if filepath not in stored] + list(stored)
+
+    # The state maps each log file to its signature and parsed row
+    state_file = output_csv + ".state"
+    state = load_state(state_file) if incremental else {}
+    signatures = {}
+    rows = {}
+    stale = []
+    for filepath in log_files:
+        if incremental:
+            signatures[filepath] = stored[filepath] if filepath in stored else file_signature(filepath)
+            known = state.get(filepath)
+            if known and known[0] == signatures[filepath]:
+                rows[filepath] = known[1]
+                continue
+        stale.append(filepath)
+    stale_files = [filepath for filepath in stale if filepath not in stored]
+    rows.update(zip(stale_files, parse_all(parse, stale_files, jobs)))
+    if stored:
+        stale_stored = [filepath for filepath in stale if filepath in stored]
+        parse = partial(parse_stored, parse_log, phases, db_file, directory, prefix)
+        rows.update(zip(stale_stored, parse_all(parse, stale_stored, jobs)))
+
+    # Ensure parent directories of the CSV file exist
+    os.makedirs(os.path.dirname(output_csv), exist_ok=True)
+
+    # Profile columns (see phase_profile.py) follow the fixed ones, in order of appearance
+    fieldnames = list(fieldnames)
+    for filepath in log_files:
+        fieldnames.extend(column for column in rows[filepath] if column not in fieldnames)
+
+    with open(output_csv, 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, restval="")
+        writer.writeheader()
+        for filepath in log_files:
+            writer.writerow(rows[filepath])
+
+    if incremental:
+        with open(state_file, 'w') as f:
+            json.dump({filepath: [signatures[filepath], rows[filepath]] for filepath in log_files}, f)
+    return len(stale)
+
+def collect_tree(output_root, data_root, jobs=None, incremental=False):
+    """Collect every <output_root>/<solver>/<suite> tree into <data_root>/<suite>/<solver>.csv."""
+    for solver, parser in SOLVER_PARSERS.items():
+        solver_dir = os.path.join(output_root, solver)
+        suites = set()
+        if os.path.isdir(solver_dir):
+            with os.scandir(solver_dir) as it:
+                suites.update(entry.name for entry in it if entry.is_dir())
+        if PARSERS[parser][3] and os.path.exists(store_file(output_root, solver)):
+            suites.update(name.split("/", 1)[0] for name, _ in OutputStore(store_file(output_root, solver)).index())
+        for suite in sorted(suites):
+            output_csv = os.path.join(data_root, suite, solver + ".csv")
+            parsed = collect_csv(parser, os.path.join(solver_dir, suite), output_csv, jobs, incremental)
+            print(f"Data has been written to {output_csv} ({parsed} files parsed)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse solver logs into CSV files.")
+    parser.add_argument("directory", help="Output directory (or a single log directory with --parser)")
+    parser.add_argument("output", help="Data directory (or the output CSV with --parser)")
+    parser.add_argument("--parser", choices=PARSERS.keys(), default=None,
+                        help="Collect a single log directory with this parser")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Number of parser processes (default: all cores)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only parse log files that changed since the previous collection")
+    args = parser.parse_args()
+
+    if args.parser:
+        collect_csv(args.parser, args.directory, args.output, args.jobs, args.incremental)
+        print(f"Data has been written to {args.output}")
+    else:
+        collect_tree(args.directory, args.output, args.jobs, args.incremental)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Compare two runs of a configuration and flag regressions.
+
+The runs, e.g. Lean-SMT before and after a checker change or -compiler
+against +compiler, are joined on the normalized benchmark key of
+results_store.py. For every SMT-LIB logic (Seventeen module) and overall, the
+speedup of the second run over the first is the geometric mean of the
+per-benchmark time ratios on the benchmarks both runs checked, with a
+bootstrap 95% confidence interval. The benchmarks the second run newly
+checked or no longer checked are listed, and those it newly timed out on if
+the timeouts of both runs are known: from the TIMEOUT results in the
+run_benchmarks.py journals (--journal1/--journal2), or from the exit times of
+the CSVs and --timeout. A benchmark without a last phase may also have
+crashed or run out of memory, so otherwise there is no such list.
+
+With --max_slowdown, the script exits with status 1 if the second run is
+slower than that factor overall or in a logic with at least --min_benchmarks
+benchmarks, i.e. if the whole confidence interval lies beyond it, so it can
+gate checker upgrades. --fail_on_lost also fails on any benchmark that is no
+longer checked.
+
+Usage:
+  python3 compare_runs.py <before.csv> <after.csv> [--time total|check] [--max_slowdown 1.1]
+                          [--journal1 <before>.jsonl --journal2 <after>.jsonl]
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from results_index import RunIndex
+from results_store import CHECK_PHASES, PHASES, load_run
+from run_benchmarks import BENCHMARK_ROOT, load_journal
+from schedule import benchmark_key
+from tables import save_table_to_latex
+
+# Timings are in whole milliseconds; shorter ones are counted as 1 ms
+MIN_TIME = 1
+
+BOOTSTRAP_SAMPLES = 2000
+
+# Largest number of resampled values drawn at once
+BOOTSTRAP_CHUNK = 1 << 22
+
+def journal_timeouts(journal_file, solver):
+    """Keys of the benchmarks whose last result in a run_benchmarks.py journal is a TIMEOUT."""
+    return {benchmark_key(path, BENCHMARK_ROOT).split("/", 1)[-1]
+            for path, result in load_journal(journal_file, solver).items() if result == "TIMEOUT"}
+
+def run_frame(csv_file, time, timeout=None, journal=None):
+    """
+    Load a run as one row per benchmark key with its group (logic, or module
+    for Seventeen), whether it was checked, its time and, if it can be told
+    from the journal or the exit times, whether it timed out.
+    """
+    df, kind = load_run(csv_file)
+    index = RunIndex(df, kind)
+    if time == "check":
+        if not CHECK_PHASES[kind]:
+            raise ValueError(f"{csv_file} has no checking phases")
+        times = df[CHECK_PHASES[kind]].astype(float).sum(axis=1, skipna=False).to_numpy()
+    else:
+        times = index.time
+
+    logic = df['logic'].astype(str)
+    frame = pd.DataFrame({
+        "benchmark": df['benchmark'].astype(str),
+        "group": logic.where(logic != "", df['family'].astype(str)),
+        "checked": index.checked,
+        "time": times,
+    })
+    if journal is not None:
+        frame["timed_out"] = frame["benchmark"].isin(journal_timeouts(journal, str(df['solver'].iloc[0])))
+    elif timeout is not None and 'exit' in df.columns:
+        # A run that did not end its last phase timed out if it lasted the timeout
+        frame["timed_out"] = (df[PHASES[kind][-1]].isna().to_numpy()
+                              & (df['exit'].astype(float).fillna(timeout * 1000).to_numpy() >= timeout * 1000))
+    return frame.drop_duplicates("benchmark", keep="last")
+
+def bootstrap_gmean(log_ratios, rng, samples=BOOTSTRAP_SAMPLES):
+    """Bootstrap 95% confidence interval of the geometric mean of the ratios."""
+    n = len(log_ratios)
+    means = []
+    step = max(1, BOOTSTRAP_CHUNK // n)
+    for start in range(0, samples, step):
+        draws = rng.integers(0, n, size=(min(step, samples - start), n))
+        means.append(log_ratios[draws].mean(axis=1))
+    low, high = np.percentile(np.concatenate(means), [2.5, 97.5])
+    return np.exp(low), np.exp(high)
+
+def speedups(both, rng, min_benchmarks):
+    """Speedup of the second run over the first, by group and overall."""
+    log_ratios = np.log(both["time_1"].clip(lower=MIN_TIME) / both["time_2"].clip(lower=MIN_TIME)).to_numpy()
+    groups = both.groupby("group").indices
+    selections = [(name, groups[name]) for name in sorted(groups) if len(groups[name]) >= min_benchmarks]
+    if len(both):
+        selections.append(("all", np.arange(len(both))))
+    table_data = []
+    for name, rows in selections:
+        low, high = bootstrap_gmean(log_ratios[rows], rng)
+        table_data.append({
+            "Logic": name,
+            "Benchmarks": len(rows),
+            "Speedup": np.exp(log_ratios[rows].mean()),
+            "CI low": low,
+            "CI high": high,
+        })
+    return pd.DataFrame(table_data, columns=["Logic", "Benchmarks", "Speedup", "CI low", "CI high"])
+
+def compare(before, after, rng, min_benchmarks=1):
+    """
+    Return the speedup table and the newly checked, lost and (if both runs
+    know their timeouts) timed-out benchmark keys.
+    """
+    merged = before.merge(after, on="benchmark", suffixes=("_1", "_2"))
+    merged["group"] = merged["group_1"]
+    both = merged[merged["checked_1"] & merged["checked_2"] & merged["time_1"].notna() & merged["time_2"].notna()]
+    changes = {
+        "newly checked": merged["benchmark"][~merged["checked_1"] & merged["checked_2"]].tolist(),
+        "no longer checked": merged["benchmark"][merged["checked_1"] & ~merged["checked_2"]].tolist(),
+    }
+    if "timed_out_1" in merged and "timed_out_2" in merged:
+        changes["newly timed out"] = merged["benchmark"][~merged["timed_out_1"] & merged["timed_out_2"]].tolist()
+    return speedups(both, rng, min_benchmarks), changes, len(merged)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two runs and report speedups and changed results.")
+    parser.add_argument("csv1", type=str, help="CSV of the first (baseline) run")
+    parser.add_argument("csv2", type=str, help="CSV of the second run")
+    parser.add_argument("--time", choices=["total", "check"], default="total",
+                        help="Compare solving + checking time (as cactus.py) or checking time only (as scatter.py)")
+    parser.add_argument("--timeout", type=int, default=None,
+                        help="Timeout (in seconds) of the runs, to tell timeouts from crashes by their exit time")
+    parser.add_argument("--journal1", type=str, default=None,
+                        help="Results journal (<solver>.jsonl) of the first run, to take its timeouts from")
+    parser.add_argument("--journal2", type=str, default=None,
+                        help="Results journal (<solver>.jsonl) of the second run, to take its timeouts from")
+    parser.add_argument("--min_benchmarks", type=int, default=10,
+                        help="Smallest number of benchmarks checked by both runs to report a logic")
+    parser.add_argument("--max_slowdown", type=float, default=None,
+                        help="Fail if the second run is slower than this factor (e.g. 1.1), overall or in a logic")
+    parser.add_argument("--fail_on_lost", action="store_true",
+                        help="Fail if the second run no longer checks a benchmark the first one checked")
+    parser.add_argument("--list", type=int, default=20, help="Number of changed benchmarks to list per kind")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the bootstrap")
+    parser.add_argument("--output", type=str, default=None, help="Also save the speedup table as a LaTeX table")
+    args = parser.parse_args()
+
+    before = run_frame(args.csv1, args.time, args.timeout, args.journal1)
+    after = run_frame(args.csv2, args.time, args.timeout, args.journal2)
+    table, changes, common = compare(before, after, np.random.default_rng(args.seed), args.min_benchmarks)
+
+    print(f"{common} benchmarks in both runs ({len(before) - common} only in the first, "
+          f"{len(after) - common} only in the second)")
+    print(f"Speedup of {args.csv2} over {args.csv1} ({args.time} time, > 1 is faster):")
+    print(table.to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+    for change, keys in changes.items():
+        print(f"\n{len(keys)} {change}")
+        for key in keys[:args.list]:
+            print(f"  {key}")
+        if len(keys) > args.list:
+            print(f"  ... {len(keys) - args.list} more")
+    if "newly timed out" not in changes:
+        print("\nTimeouts unknown: pass --journal1/--journal2, or --timeout for CSVs with exit times")
+    if args.output:
+        ratios = ["Speedup", "CI low", "CI high"]
+        save_table_to_latex(table.assign(**{column: table[column].map("{:.3f}".format) for column in ratios}),
+                            common, args.output)
+
+    failures = []
+    if args.max_slowdown is not None:
+        slower = table[table["CI high"] < 1 / args.max_slowdown]
+        failures.extend(f"{row.Logic} is {1 / row.Speedup:.2f}x slower" for row in slower.itertuples())
+    if args.fail_on_lost and changes["no longer checked"]:
+        failures.append(f"{len(changes['no longer checked'])} benchmarks no longer checked")
+    if failures:
+        print("\nRegression: " + "; ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
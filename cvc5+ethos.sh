@@ -2,42 +2,66 @@
 
 input_file="$1"
 
-# Temporary file for the proof
-proof_file=$(mktemp /tmp/ethos.proof.XXXXXX.cpc)
-
-# Function to generate proof
-generate_proof() {
-    local input_file="$1"
-    echo "(include \"/home/user/artifact/cvc5/proofs/eo/cpc/Cpc.eo\")"
-    /home/user/artifact/cvc5/build/bin/cvc5 --enum-inst --cegqi-midpoint --produce-proofs --proof-elim-subtypes --dump-proofs --proof-format=cpc --proof-granularity=dsl-rewrite "$input_file" | tail -n +3 | head -n -1
+# Profile records (run_benchmarks.py --profile) go to the log even from redirected phases
+exec 3>&1
+
+# Run a phase, through the profiler if profiling is enabled
+profile() {
+    local phase="$1"
+    shift
+    if [ -n "$ARTIFACT_PROFILE" ]; then
+        python3 /home/user/artifact/phase_profile.py run "$phase" "$@"
+    else
+        "$@"
+    fi
 }
 
 # Function to check proof
 check_proof() {
-    cat "$proof_file" | grep WARNING
-    CHECK=$(cat "$proof_file" | grep "step\|assume")
-    [ -z "$CHECK" ] && echo "; WARNING: Empty proof"
-    /home/user/artifact/cvc5/deps/bin/ethos "$proof_file"
+    cat "$notes_file"
+    profile check /home/user/artifact/cvc5/deps/bin/ethos "$proof_file"
 }
 
 echo "=== Generate proof with cvc5"
 
-# Measure time for proof generation
-start_time=$(date +%s%3N) # Start time in milliseconds
-generate_proof "$input_file" > "$proof_file"
-end_time=$(date +%s%3N)   # End time in milliseconds
-
-# Calculate and print the elapsed time for generation
-gen_time=$((end_time - start_time))
+# cvc5 and its options, and the pass that strips its output down to the proof
+# and notes the warnings in it, are defined once in proof_store.py, which
+# writes the proof, the warnings and the solve time to <entry>.cpc, .notes
+# and .time
+if [ -n "$ARTIFACT_PROOF_STORE" ]; then
+    # Solve once for all configurations and check the stored proof
+    entry=$(python3 /home/user/artifact/proof_store.py fetch "$ARTIFACT_PROOF_STORE" "$input_file") || exit 1
+    # Only there for a proof that was not stored because cvc5 failed
+    status=$(cat "$entry.status" 2>/dev/null || echo 0)
+else
+    # In the directory run_benchmarks.py provides (and removes after the run,
+    # even if it is killed)
+    entry_dir=$(mktemp -d "${ARTIFACT_PROOF_DIR:-/tmp}/ethos.XXXXXX")
+    trap 'rm -rf "$entry_dir"' EXIT
+    entry="$entry_dir/proof"
+    python3 /home/user/artifact/proof_store.py solve "$input_file" "$entry"
+    status=$?
+fi
+proof_file="$entry.cpc"
+notes_file="$entry.notes"
+gen_time=$(cat "$entry.time" 2>/dev/null)
 echo "[time] solve: $gen_time"
 
+[ -n "$ARTIFACT_PROFILE" ] && python3 /home/user/artifact/phase_profile.py proof "$proof_file"
+
 echo "=== Check proof with ethos"
 
 # Measure time for proof checking
 start_time=$(date +%s%3N)
 check_proof
+check_status=$?
+[ "$status" -eq 0 ] && status=$check_status
 end_time=$(date +%s%3N)
 
 # Calculate and print the elapsed time for checking
 check_time=$((end_time - start_time))
 echo "[time] check: $check_time"
+
+# Exit with the status of the first phase that failed, so that run_benchmarks.py
+# can tell a solver that ran out of memory under --limits rlimit
+exit $status
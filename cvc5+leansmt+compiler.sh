@@ -2,4 +2,44 @@
 
 input_file="$1"
 
-LEAN_SYSROOT=/home/user/.elan/toolchains/leanprover--lean4---v4.20.0-rc5 LEAN_PATH=/home/user/artifact/lean-cpc-checker/.lake/build/lib/lean:/home/user/.elan/toolchains/leanprover--lean4---v4.20.0-rc5/lib/lean /home/user/artifact/lean-cpc-checker/.lake/build/bin/checker true $input_file
+# Warm-worker mode: load the environment once and read benchmark paths from stdin
+if [ "$input_file" = "--server" ]; then
+  exec env LEAN_SYSROOT=/home/user/.elan/toolchains/leanprover--lean4---v4.20.0-rc5 LEAN_PATH=/home/user/artifact/lean-cpc-checker/.lake/build/lib/lean:/home/user/.elan/toolchains/leanprover--lean4---v4.20.0-rc5/lib/lean /home/user/artifact/lean-cpc-checker/.lake/build/bin/checker true --server
+fi
+
+# Profile records (run_benchmarks.py --profile) go to the log even from redirected phases
+exec 3>&1
+
+# Run a phase, through the profiler if profiling is enabled
+profile() {
+    local phase="$1"
+    shift
+    if [ -n "$ARTIFACT_PROFILE" ]; then
+        python3 /home/user/artifact/phase_profile.py run "$phase" "$@"
+    else
+        "$@"
+    fi
+}
+
+# Check the proof of the shared proof store (see proof_store.py) instead of
+# running cvc5 in the checker, which then reports no solve time of its own.
+# run_benchmarks.py sets ARTIFACT_CHECKER_PROOF if the checker can load a
+# recorded proof (--proof); otherwise the checker solves in place.
+proof=()
+status=0
+if [ -n "$ARTIFACT_PROOF_STORE" ] && [ -n "$ARTIFACT_CHECKER_PROOF" ]; then
+  entry=$(python3 /home/user/artifact/proof_store.py fetch "$ARTIFACT_PROOF_STORE" "$input_file") || exit 1
+  echo "[time] solve: $(cat "$entry.time")"
+  proof=(--proof "$entry.cpc")
+  # Only there for a proof that was not stored because cvc5 failed
+  status=$(cat "$entry.status" 2>/dev/null || echo 0)
+fi
+
+# The checker reports the times of its own phases; the profile covers the whole process
+profile checker env LEAN_SYSROOT=/home/user/.elan/toolchains/leanprover--lean4---v4.20.0-rc5 LEAN_PATH=/home/user/artifact/lean-cpc-checker/.lake/build/lib/lean:/home/user/.elan/toolchains/leanprover--lean4---v4.20.0-rc5/lib/lean /home/user/artifact/lean-cpc-checker/.lake/build/bin/checker true "${proof[@]}" "$input_file"
+check_status=$?
+[ "$status" -eq 0 ] && status=$check_status
+
+# Exit with the status of the first phase that failed, so that run_benchmarks.py
+# can tell a solver that ran out of memory under --limits rlimit
+exit $status
@@ -2,11 +2,30 @@
 
 input_file="$1"
 
+# Profile records (run_benchmarks.py --profile) go to the log even from redirected phases
+exec 3>&1
+
+# Run a phase, through the profiler if profiling is enabled
+profile() {
+    local phase="$1"
+    shift
+    if [ -n "$ARTIFACT_PROFILE" ]; then
+        python3 /home/user/artifact/phase_profile.py run "$phase" "$@"
+    else
+        "$@"
+    fi
+}
+
 # Measure time for proof generation
 start_time=$(date +%s%3N) # Start time in milliseconds
-/home/user/artifact/duper/.lake/build/bin/duper $input_file
+profile solve /home/user/artifact/duper/.lake/build/bin/duper $input_file
+status=$?
 end_time=$(date +%s%3N)   # End time in milliseconds
 
 # Calculate and print the elapsed time for generation
 gen_time=$((end_time - start_time))
 echo "[time] prove: $gen_time"
+
+# Exit with the status of the first phase that failed, so that run_benchmarks.py
+# can tell a solver that ran out of memory under --limits rlimit
+exit $status
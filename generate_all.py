@@ -0,0 +1,81 @@
+"""Generate every figure and table from one in-memory dataset.
+
+Each suite is loaded and indexed once (see results_index.py). The cactus
+curves and tables of every selection, including the QF_ variants and the
+per-logic breakdown, are slices of the same index, and the per-run check
+times are computed once for the scatter plots. The artifacts are then
+rendered in parallel worker processes.
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import cactus
+import scatter
+import tables
+from results_index import cactus_bands, cactus_curves, index_runs, summary_table
+from results_store import load_runs
+
+# Scatter plots of SMT-LIB checking times: Lean-SMT configuration vs. Ethos
+SCATTER_PLOTS = [
+    ("cvc5+leansmt-compiler", "cvc5+ethos", "scatter-compiler.pdf"),
+    ("cvc5+leansmt+compiler", "cvc5+ethos", "scatter+compiler.pdf"),
+]
+
+QF_FILTER = "QF_"
+
+def plan_artifacts(data_dir, figures_dir, tables_dir):
+    """Load the data once and return the (function, arguments) that write each artifact."""
+    tasks = []
+
+    seventeen = index_runs(load_runs(os.path.join(data_dir, "seventeen", "*.csv")))
+    if seventeen:
+        tasks.append((partial(cactus.generate_plot, bands=cactus_bands(seventeen)),
+                      (cactus_curves(seventeen), os.path.join(figures_dir, "seventeen.pdf"))))
+        tasks.append((tables.save_table_to_latex,
+                      (*summary_table(seventeen), os.path.join(tables_dir, "seventeen.tex"))))
+
+    smtlib_runs = load_runs(os.path.join(data_dir, "SMT-LIB", "*.csv"))
+    smtlib = index_runs(smtlib_runs)
+    if smtlib:
+        tasks.append((partial(cactus.generate_plot, bands=cactus_bands(smtlib)),
+                      (cactus_curves(smtlib), os.path.join(figures_dir, "SMT-LIB.pdf"))))
+        tasks.append((partial(cactus.generate_plot, bands=cactus_bands(smtlib, benchmark_filter=QF_FILTER)),
+                      (cactus_curves(smtlib, benchmark_filter=QF_FILTER), os.path.join(figures_dir, "QF_SMT-LIB.pdf"))))
+        table, total = summary_table(smtlib)
+        tasks.append((tables.save_table_to_latex, (table, total, os.path.join(tables_dir, "SMT-LIB.tex"))))
+        tasks.append((tables.save_table_to_latex, (*summary_table(smtlib, benchmark_filter=QF_FILTER),
+                                                   os.path.join(tables_dir, "QF_SMT-LIB.tex"))))
+        tasks.append((tables.save_table_to_latex, (tables.logic_breakdown(smtlib), total,
+                                                   os.path.join(tables_dir, "SMT-LIB_by_logic.tex"))))
+
+        check_times = {name: scatter.check_times(df, kind)
+                       for name, (df, kind) in smtlib_runs.items() if kind != "solve"}
+        for lean, ethos, output in SCATTER_PLOTS:
+            if lean in check_times and ethos in check_times:
+                tasks.append((scatter.plot_check_times,
+                              (check_times[lean], check_times[ethos], os.path.join(figures_dir, output))))
+    return tasks
+
+def generate_all(data_dir, figures_dir, tables_dir, jobs=None):
+    tasks = plan_artifacts(data_dir, figures_dir, tables_dir)
+    if not tasks:
+        print(f"No data found under {data_dir}")
+        return
+    with ProcessPoolExecutor(jobs or min(len(tasks), os.cpu_count())) as pool:
+        futures = [pool.submit(func, *args) for func, args in tasks]
+        for (_, args), future in zip(tasks, futures):
+            future.result()
+            print(f"Generated {args[-1]}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate all figures and tables from the benchmark data.")
+    parser.add_argument("data_dir", type=str, help="Directory with the seventeen and SMT-LIB data subdirectories.")
+    parser.add_argument("figures_dir", type=str, help="Output directory for the figures.")
+    parser.add_argument("tables_dir", type=str, help="Output directory for the tables.")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Number of artifacts to render in parallel.")
+    args = parser.parse_args()
+
+    generate_all(args.data_dir, args.figures_dir, args.tables_dir, args.jobs)
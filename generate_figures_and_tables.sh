@@ -31,17 +31,8 @@ rm -rf "${FIGURES_DIR}" "${TABLES_DIR}"
 
 mkdir -p "${FIGURES_DIR}" "${TABLES_DIR}"
 
-# Generate figures
-python3 cactus.py "${DATA_DIR}/seventeen" "${FIGURES_DIR}/seventeen.pdf"
-python3 cactus.py "${DATA_DIR}/SMT-LIB" "${FIGURES_DIR}/SMT-LIB.pdf"
-python3 cactus.py --benchmark_filter QF_ "${DATA_DIR}/SMT-LIB" "${FIGURES_DIR}/QF_SMT-LIB.pdf"
-python3 scatter.py "${DATA_DIR}/SMT-LIB/cvc5+leansmt-compiler.csv" "${DATA_DIR}/SMT-LIB/cvc5+ethos.csv" "${FIGURES_DIR}/scatter-compiler.pdf"
-python3 scatter.py "${DATA_DIR}/SMT-LIB/cvc5+leansmt+compiler.csv" "${DATA_DIR}/SMT-LIB/cvc5+ethos.csv" "${FIGURES_DIR}/scatter+compiler.pdf"
-
-# Generate tables
-python3 tables.py "${DATA_DIR}/seventeen" "${TABLES_DIR}/seventeen.tex"
-python3 tables.py "${DATA_DIR}/SMT-LIB" "${TABLES_DIR}/SMT-LIB.tex"
-python3 tables.py --benchmark_filter QF_ "${DATA_DIR}/SMT-LIB" "${TABLES_DIR}/QF_SMT-LIB.tex"
+# Load the data once and generate all figures and tables in a single process
+python3 generate_all.py "${DATA_DIR}" "${FIGURES_DIR}" "${TABLES_DIR}"
 
 echo "Finished generating figures & tables under:"
 echo "  ${FIGURES_DIR}"
@@ -0,0 +1,197 @@
+"""Kernel-enforced resource limits for run_benchmarks.py.
+
+The cgroup backend runs every benchmark in its own cgroup v2 with memory.max
+set to the memory limit and reads the MEMOUT cause, peak memory and CPU time
+back from the cgroup. Its peak memory is memory.peak, which counts the page
+cache of the benchmark (e.g. the proof files it writes) along with its RSS. The rlimit backend sets RLIMIT_AS on each process of the
+benchmark instead, and detects a MEMOUT from the exit status and out-of-memory
+message of the solver, which the wrappers pass on. Both backends set
+RLIMIT_CPU to the timeout and wait for the solver on a pidfd, so no thread
+polls the process tree.
+"""
+
+import os
+import re
+import select
+import signal
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+CGROUP_MOUNT = Path("/sys/fs/cgroup")
+
+# Messages solvers print when an allocation fails under RLIMIT_AS
+OOM_MESSAGE = re.compile(r"bad_alloc|[Oo]ut of memory|Cannot allocate memory|MemoryError")
+
+def find_cgroup_root():
+    """Return the cgroup v2 directory of this process, or None."""
+    try:
+        with open("/proc/self/cgroup") as f:
+            for line in f:
+                if line.startswith("0::"):
+                    rel = line.strip()[3:].lstrip("/")
+                    break
+            else:
+                return None
+    except OSError:
+        return None
+    for mount in (CGROUP_MOUNT, CGROUP_MOUNT / "unified"):
+        root = mount / rel
+        if (root / "cgroup.controllers").exists():
+            return root
+    return None
+
+def setup_cgroup_root(root):
+    """
+    Prepare a delegated cgroup so that benchmarks can get child cgroups with
+    the memory controller. Move this process into a leaf first, since cgroup
+    v2 does not allow processes in a cgroup that distributes controllers.
+    Return the root on success and None if the cgroup cannot be used.
+    """
+    if root is None:
+        return None
+    try:
+        root = Path(root)
+        if "memory" not in (root / "cgroup.controllers").read_text().split():
+            return None
+        if "memory" not in (root / "cgroup.subtree_control").read_text().split():
+            harness = root / "harness"
+            harness.mkdir(exist_ok=True)
+            (harness / "cgroup.procs").write_text(str(os.getpid()))
+            (root / "cgroup.subtree_control").write_text("+memory")
+        try:
+            (root / "cgroup.subtree_control").write_text("+cpu")
+        except OSError:
+            pass  # cpu.stat is available without the cpu controller
+        return root
+    except OSError:
+        return None
+
+def read_keyed(path):
+    """Parse a flat keyed cgroup file such as memory.events or cpu.stat."""
+    try:
+        return {k: int(v) for k, v in (line.split() for line in path.read_text().splitlines())}
+    except (OSError, ValueError):
+        return {}
+
+def wrap_command(cmd, timeout, memout_mb, cgroup=None):
+    """Apply the limits in a shell that then execs the solver."""
+    script = f"ulimit -t {int(timeout) + 1}; "
+    if cgroup is None:
+        script += f"ulimit -v {memout_mb * 1024}; "
+    else:
+        script += f'echo 0 > "{cgroup}/cgroup.procs" || exit 125; '
+    script += 'exec "$@"'
+    return ["/bin/sh", "-c", script, "sh"] + list(cmd)
+
+def wait_with_timeout(proc, timeout):
+    """
+    Block until the process exits or the timeout expires, without polling.
+    Return the resource usage of the process (and its reaped children), or
+    None on timeout.
+    """
+    pidfd = os.pidfd_open(proc.pid)
+    try:
+        ready, _, _ = select.select([pidfd], [], [], timeout)
+    finally:
+        os.close(pidfd)
+    if not ready:
+        return None
+    _, status, rusage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return rusage
+
+def kill_group(proc, cgroup=None):
+    if cgroup is not None and (cgroup / "cgroup.kill").exists():
+        (cgroup / "cgroup.kill").write_text("1")
+    else:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    _, status, rusage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return rusage
+
+def remove_cgroup(cgroup):
+    # Killed processes leave the cgroup asynchronously
+    for _ in range(50):
+        try:
+            cgroup.rmdir()
+            return
+        except FileNotFoundError:
+            return
+        except OSError:
+            time.sleep(0.1)
+
+def read_tail(fd, size):
+    """The last size bytes written to the file fd."""
+    end = os.fstat(fd).st_size
+    return os.pread(fd, size, max(0, end - size))
+
+def run_limited(cmd, timeout, memout_mb, out_fd, err_fd, cgroup_root=None, env=None):
+    """
+    Run cmd under kernel-enforced limits: in a fresh cgroup below cgroup_root
+    if given, otherwise with rlimits only. Return (code, usage) like
+    run_benchmarks.run_with_limits.
+    """
+    cgroup = None
+    try:
+        if cgroup_root is not None:
+            cgroup = Path(tempfile.mkdtemp(prefix="bench-", dir=cgroup_root))
+            (cgroup / "memory.max").write_text(str(memout_mb * 1024 * 1024))
+            if (cgroup / "memory.swap.max").exists():
+                (cgroup / "memory.swap.max").write_text("0")
+            if (cgroup / "memory.oom.group").exists():
+                (cgroup / "memory.oom.group").write_text("1")
+
+        start = time.monotonic()
+        proc = subprocess.Popen(
+            wrap_command(cmd, timeout, memout_mb, cgroup),
+            stdout=out_fd,
+            stderr=err_fd,
+            env=env,
+            start_new_session=True  # new process group
+        )
+        rusage = wait_with_timeout(proc, timeout)
+        timed_out = rusage is None
+        if timed_out:
+            rusage = kill_group(proc, cgroup)
+        wall_time = round(time.monotonic() - start, 3)
+
+        # ru_maxrss is in KB and covers only the largest single process. Since
+        # it survives exec, it is at least the RSS of this process at the fork,
+        # so it is reported as an upper bound but not used to detect memouts.
+        usage = {"peak_rss_mb": rusage.ru_maxrss // 1024,
+                 "cpu_time": round(rusage.ru_utime + rusage.ru_stime, 3),
+                 "wall_time": wall_time}
+        if cgroup is not None:
+            peak = cgroup / "memory.peak"
+            # Includes page cache, which memory.max limits as well
+            if peak.exists():
+                usage["peak_rss_mb"] = int(peak.read_text()) // (1024 * 1024)
+            cpu = read_keyed(cgroup / "cpu.stat")
+            if "usage_usec" in cpu:
+                usage["cpu_time"] = round(cpu["usage_usec"] / 1e6, 3)
+            memout = read_keyed(cgroup / "memory.events").get("oom_kill", 0) > 0
+        else:
+            # The wrappers exit with the status of the first phase that failed,
+            # so a solver whose allocations failed under RLIMIT_AS shows as a
+            # nonzero exit with its out-of-memory message on stderr
+            stderr = read_tail(err_fd, 65536).decode(errors="replace")
+            memout = proc.returncode != 0 and OOM_MESSAGE.search(stderr) is not None
+
+        if memout:
+            return "MEMOUT", usage
+        # RLIMIT_CPU applies to each process, so a phase that runs out of CPU
+        # time within a wrapper shows as the exit status 128 + SIGXCPU
+        if timed_out or proc.returncode in (-signal.SIGXCPU, 128 + signal.SIGXCPU):
+            return "TIMEOUT", usage
+        return proc.returncode, usage
+    except Exception as e:
+        os.write(err_fd, str(e).encode())
+        return "ERROR", {}
+    finally:
+        if cgroup is not None:
+            remove_cgroup(cgroup)
@@ -0,0 +1,151 @@
+"""Manifest of the benchmark files, to select benchmarks before running them.
+
+The manifest is a CSV with a row per benchmark file below the benchmark root,
+scanned once across a process pool: its path relative to the root, the
+SHA-256 of its content, its size in bytes, its logic (from set-logic, else
+from the non-incremental/<LOGIC>/<family> layout), its family (for Seventeen,
+the module) and the value of its (set-info :status ...). Files with the same
+content name the first of them (in path order) as duplicate_of.
+
+run_benchmarks.py --manifest then drops benchmarks by status, logic or size,
+and duplicates of benchmarks earlier in the list, before any solver starts.
+
+Usage:
+  python3 manifest.py <manifest.csv> [--root DIR] [--jobs J]
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from schedule import benchmark_key, path_groups
+
+# Files of the SMT-LIB, Seventeen SMT2 and Seventeen FOF benchmark sets
+BENCHMARK_SUFFIXES = (".smt2", ".smt_in", ".p")
+
+STATUS = re.compile(rb"\(set-info\s+:status\s+([^\s()]+)\s*\)")
+LOGIC = re.compile(rb"\(set-logic\s+([^\s()]+)\s*\)")
+
+# Bytes kept from the end of a block so that a header split between blocks is found
+OVERLAP = 256
+
+FIELDS = ["path", "sha256", "size", "logic", "family", "status", "duplicate_of"]
+
+def find_benchmarks(directory):
+    """List the benchmark files below directory."""
+    paths = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    paths.extend(find_benchmarks(entry.path))
+                elif entry.name.endswith(BENCHMARK_SUFFIXES):
+                    paths.append(entry.path)
+    except OSError:
+        pass
+    return paths
+
+def scan_file(path):
+    """Hash a benchmark file and find its logic and status. Return (sha256, size, logic, status)."""
+    digest = hashlib.sha256()
+    size = 0
+    found = {STATUS: None, LOGIC: None}
+    tail = b""
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+            size += len(block)
+            if None in found.values():
+                window = tail + block
+                for pattern in [pattern for pattern, value in found.items() if value is None]:
+                    match = pattern.search(window)
+                    if match:
+                        found[pattern] = match.group(1).decode(errors="replace")
+                tail = window[-OVERLAP:]
+    return digest.hexdigest(), size, found[LOGIC] or "", found[STATUS] or ""
+
+def build(root, jobs=None):
+    """Scan the benchmark files below root. Return their manifest rows in path order."""
+    paths = sorted(find_benchmarks(root))
+    jobs = jobs or os.cpu_count()
+    with ProcessPoolExecutor(jobs) as pool:
+        scans = list(pool.map(scan_file, paths, chunksize=max(1, len(paths) // (jobs * 8))))
+
+    rows = []
+    first = {}
+    for path, (sha256, size, logic, status) in zip(paths, scans):
+        key = benchmark_key(path, root)
+        path_logic, family = path_groups(key)
+        rows.append({
+            "path": key,
+            "sha256": sha256,
+            "size": size,
+            "logic": logic or path_logic,
+            "family": family,
+            "status": status,
+            "duplicate_of": first.get(sha256, ""),
+        })
+        first.setdefault(sha256, key)
+    return rows
+
+def load_manifest(manifest_file):
+    """Map the path of every benchmark in the manifest to its row."""
+    with open(manifest_file, 'r', newline='') as f:
+        return {row["path"]: row for row in csv.DictReader(f)}
+
+def select(paths, manifest, root, skip_status=(), logics=None, max_size=None, dedup=False):
+    """
+    Drop the benchmark paths with a status in skip_status, a logic not in
+    logics or more than max_size bytes, and with dedup those with the content
+    of a benchmark kept before. Paths missing from the manifest are kept.
+    Return the kept paths, in order, and the number dropped for each reason.
+    """
+    kept = []
+    dropped = Counter()
+    seen = set()
+    for path in paths:
+        entry = manifest.get(benchmark_key(path, root))
+        if entry is None:
+            dropped["not in manifest (kept)"] += 1
+            kept.append(path)
+        elif entry["status"] in skip_status:
+            dropped[f"status {entry['status']}"] += 1
+        elif logics and entry["logic"] not in logics:
+            dropped["logic"] += 1
+        elif max_size is not None and int(entry["size"]) > max_size:
+            dropped["size"] += 1
+        elif dedup and entry["sha256"] in seen:
+            dropped["duplicate"] += 1
+        else:
+            seen.add(entry["sha256"])
+            kept.append(path)
+    return kept, dropped
+
+def main():
+    from run_benchmarks import BENCHMARK_ROOT
+
+    parser = argparse.ArgumentParser(description="Scan the benchmark files into a manifest.")
+    parser.add_argument("manifest", help="Path of the manifest CSV to write")
+    parser.add_argument("--root", type=str, default=str(BENCHMARK_ROOT), help="Benchmark root to scan")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Number of scanning processes (default: all cores)")
+    args = parser.parse_args()
+
+    rows = build(args.root, args.jobs)
+    os.makedirs(os.path.dirname(os.path.abspath(args.manifest)), exist_ok=True)
+    with open(args.manifest, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    statuses = Counter(row["status"] or "none" for row in rows)
+    duplicates = sum(1 for row in rows if row["duplicate_of"])
+    print(f"Scanned {len(rows)} benchmarks into {args.manifest}: "
+          + ", ".join(f"{count} {status}" for status, count in sorted(statuses.items()))
+          + f"; {duplicates} duplicates of other files")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Live metrics of run_benchmarks.py in the Prometheus text format.
+
+With --metrics_port, run_benchmarks.py serves the metrics of the run on
+http://<--metrics_host>:<port>/metrics (127.0.0.1 by default); with
+--metrics_file, it rewrites that file every few seconds, e.g. for the textfile
+collector of node_exporter. Neither needs anything beyond the standard
+library and psutil. The metrics are:
+
+  artifact_benchmarks{solver}                   benchmarks to run in this invocation
+  artifact_benchmarks_completed_total{solver}   finished benchmarks
+  artifact_benchmarks_pending{solver}           benchmarks not finished yet
+  artifact_benchmarks_running{solver}           benchmarks running now
+  artifact_results_total{solver,status}         finished benchmarks by status: TIMEOUT, MEMOUT
+                                                or ERROR, else the result the collector of the
+                                                solver finds in its output (e.g. unsat)
+  artifact_phase_seconds{solver,phase}          summary of the [time] phases, with quantiles
+  artifact_throughput_benchmarks_per_minute     finished benchmarks per minute since the start
+  artifact_workers, artifact_workers_busy       jobs of the pool and running tasks
+  artifact_worker_utilization                   busy share of the jobs
+  artifact_worker_rss_bytes{worker}             resident memory of each pool worker and its solver
+  artifact_start_time_seconds                   when the run started
+  artifact_last_completion_time_seconds         when the last benchmark finished (for stalls)
+"""
+
+import bisect
+import io
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import psutil
+
+from collect_stats import LABEL_COLUMNS, PARSERS, SOLVER_PARSERS
+
+# Quantiles of the phase times
+QUANTILES = [0.5, 0.9, 0.99]
+
+# Seconds between rewrites of the metrics file
+WRITE_INTERVAL = 5
+
+def label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def labels(**pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f"{name}=\"{label_value(value)}\"" for name, value in pairs.items()) + "}"
+
+def parse_output(solver, stdout_path, stdout=None):
+    """
+    Parse the output of a finished benchmark, from the file stdout_path or,
+    if given, the stored bytes stdout, with the collector of its solver.
+    Return its row, or {} if there is nothing to parse.
+    """
+    parse, _, log_path, parse_log = PARSERS[SOLVER_PARSERS[solver]]
+    try:
+        if stdout is not None:
+            return parse_log(stdout_path, io.TextIOWrapper(io.BytesIO(stdout)))
+        return parse(log_path(stdout_path) if log_path else stdout_path)
+    except (OSError, ValueError, IndexError):
+        return {}
+
+class Metrics:
+    def __init__(self, jobs, metrics_file=None):
+        self.jobs = jobs
+        self.metrics_file = metrics_file
+        self.lock = threading.Lock()
+        self.start_time = time.time()
+        self.last_completion = None
+        self.last_write = 0
+        self.totals = {}
+        self.completed = {}
+        self.running = {}
+        self.statuses = {}
+        self.phases = {}  # (solver, phase) to the sorted times in seconds
+
+    def begin(self, totals):
+        """Start counting the benchmarks of each solver."""
+        with self.lock:
+            self.totals = dict(totals)
+            self.completed = {solver: 0 for solver in totals}
+            self.running = {solver: 0 for solver in totals}
+
+    def started(self, solver):
+        with self.lock:
+            self.running[solver] += 1
+
+    def stopped(self, solver):
+        with self.lock:
+            self.running[solver] -= 1
+
+    def record(self, solver, code, row):
+        """Count a finished benchmark with its result code and the row its collector parsed from the output."""
+        status = code if isinstance(code, str) else (row.get("result") or "unknown")
+        phases = [column for column in PARSERS[SOLVER_PARSERS[solver]][1] if column not in LABEL_COLUMNS]
+        with self.lock:
+            self.completed[solver] += 1
+            self.statuses[(solver, status)] = self.statuses.get((solver, status), 0) + 1
+            for phase in phases:
+                if row.get(phase, "") != "":
+                    bisect.insort(self.phases.setdefault((solver, phase), []), int(row[phase]) / 1000)
+            self.last_completion = time.time()
+
+    def worker_rss(self):
+        """Resident memory of the process tree of each pool worker, by pid."""
+        rss = {}
+        for worker in psutil.Process().children():
+            try:
+                rss[worker.pid] = sum(p.memory_info().rss for p in [worker] + worker.children(recursive=True))
+            except psutil.NoSuchProcess:
+                pass
+        return rss
+
+    def render(self):
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, sample_labels, value in samples:
+                lines.append(f"{name}{suffix}{labels(**sample_labels)} {value}")
+
+        worker_rss = self.worker_rss()
+        with self.lock:
+            solvers = list(self.totals)
+            busy = sum(self.running.values())
+            elapsed = time.time() - self.start_time
+            done = sum(self.completed.values())
+            metric("artifact_benchmarks", "gauge", "Benchmarks to run in this invocation",
+                   [("", {"solver": solver}, self.totals[solver]) for solver in solvers])
+            metric("artifact_benchmarks_completed_total", "counter", "Finished benchmarks",
+                   [("", {"solver": solver}, self.completed[solver]) for solver in solvers])
+            metric("artifact_benchmarks_pending", "gauge", "Benchmarks not finished yet",
+                   [("", {"solver": solver}, self.totals[solver] - self.completed[solver]) for solver in solvers])
+            metric("artifact_benchmarks_running", "gauge", "Benchmarks running now",
+                   [("", {"solver": solver}, self.running[solver]) for solver in solvers])
+            metric("artifact_results_total", "counter", "Finished benchmarks by status",
+                   [("", {"solver": solver, "status": status}, count)
+                    for (solver, status), count in sorted(self.statuses.items())])
+            samples = []
+            for (solver, phase), times in sorted(self.phases.items()):
+                for q in QUANTILES:
+                    samples.append(("", {"solver": solver, "phase": phase, "quantile": q},
+                                    times[int(q * (len(times) - 1))]))
+                samples.append(("_sum", {"solver": solver, "phase": phase}, round(sum(times), 3)))
+                samples.append(("_count", {"solver": solver, "phase": phase}, len(times)))
+            metric("artifact_phase_seconds", "summary", "Time of the [time] phases of the finished benchmarks",
+                   samples)
+            metric("artifact_throughput_benchmarks_per_minute", "gauge", "Finished benchmarks per minute since the start",
+                   [("", {}, round(done / elapsed * 60, 3) if elapsed > 0 else 0)])
+            metric("artifact_workers", "gauge", "Jobs of the pool", [("", {}, self.jobs)])
+            metric("artifact_workers_busy", "gauge", "Running tasks", [("", {}, busy)])
+            metric("artifact_worker_utilization", "gauge", "Busy share of the jobs",
+                   [("", {}, round(busy / self.jobs, 3))])
+            metric("artifact_worker_rss_bytes", "gauge", "Resident memory of a pool worker and its solver",
+                   [("", {"worker": pid}, rss) for pid, rss in sorted(worker_rss.items())])
+            metric("artifact_start_time_seconds", "gauge", "When the run started", [("", {}, self.start_time)])
+            if self.last_completion is not None:
+                metric("artifact_last_completion_time_seconds", "gauge", "When the last benchmark finished",
+                       [("", {}, self.last_completion)])
+        return "\n".join(lines) + "\n"
+
+    def write(self, force=False):
+        """Rewrite the metrics file, at most every WRITE_INTERVAL seconds unless forced."""
+        if self.metrics_file is None or (not force and time.monotonic() - self.last_write < WRITE_INTERVAL):
+            return
+        self.last_write = time.monotonic()
+        tmp = f"{self.metrics_file}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(self.render())
+        # Atomic, so that a collector never reads a partial file
+        os.replace(tmp, self.metrics_file)
+
+    def serve(self, host, port):
+        """Serve the metrics on http://host:port/metrics from a background thread."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = HTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
@@ -0,0 +1,130 @@
+"""Packed store of solver output for run_benchmarks.py.
+
+By default the output of every (solver, benchmark) pair is a .stdout and a
+.stderr file in a tree that mirrors the benchmark root. With --output_store,
+run_benchmarks.py instead packs the output of each solver into one SQLite
+database, <output_dir>/<solver>.outputs.db, with the stdout and stderr of
+every run compressed with zlib and indexed by the benchmark path relative to
+the benchmark root (e.g. SMT-LIB/non-incremental/QF_UF/f/x.smt2). Repetitions
+(--repeat) are the runs 2, 3, ... of their benchmark.
+
+The collectors read the store in place of the tree (see collect_stats.py), and
+the export command rebuilds the tree when the files themselves are needed.
+
+Usage:
+  python3 output_store.py export <output directory> <solver> [<solver> ...]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+import zlib
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outputs (
+    name TEXT NOT NULL,
+    run INTEGER NOT NULL,
+    stdout BLOB NOT NULL,
+    stderr BLOB NOT NULL,
+    finished REAL NOT NULL,
+    PRIMARY KEY (name, run)
+) WITHOUT ROWID;
+"""
+
+def store_file(out_dir, solver):
+    return os.path.join(out_dir, f"{solver}.outputs.db")
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+class OutputStore:
+    """The packed output of one solver. The connection is opened on first use, in the process that uses it."""
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.db = None
+
+    def __getstate__(self):
+        return {"db_file": self.db_file, "db": None}
+
+    def connect(self):
+        if self.db is None:
+            # No WAL: its shared memory does not work over network file systems
+            self.db = sqlite3.connect(self.db_file, timeout=300, isolation_level=None)
+            self.db.executescript(SCHEMA)
+        return self.db
+
+    def scratch_files(self):
+        """Files for the output of a run of this process until it is put into the store."""
+        base = f"{self.db_file}-{os.getpid()}"
+        return [f"{base}.stdout", f"{base}.stderr"]
+
+    def put(self, name, runs):
+        """
+        Store the output files of the runs of a benchmark, replacing any runs
+        stored before, and remove the files.
+        """
+        records = [(name, i + 1, zlib.compress(read_bytes(stdout_path)), zlib.compress(read_bytes(stderr_path)),
+                    time.time()) for i, (stdout_path, stderr_path) in enumerate(runs)]
+        db = self.connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM outputs WHERE name = ?", (name,))
+            db.executemany("INSERT INTO outputs VALUES (?, ?, ?, ?, ?)", records)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        for paths in runs:
+            for path in paths:
+                os.unlink(path)
+
+    def get(self, name):
+        """Return the (stdout, stderr) of each stored run of a benchmark, in run order."""
+        rows = self.connect().execute("SELECT stdout, stderr FROM outputs WHERE name = ? ORDER BY run", (name,))
+        return [(zlib.decompress(stdout), zlib.decompress(stderr)) for stdout, stderr in rows]
+
+    def __contains__(self, name):
+        return self.connect().execute("SELECT 1 FROM outputs WHERE name = ? LIMIT 1", (name,)).fetchone() is not None
+
+    def index(self, prefix=""):
+        """List the benchmarks below prefix (e.g. SMT-LIB/) in name order, with the time their output was stored."""
+        rows = self.connect().execute("SELECT name, MAX(finished) FROM outputs WHERE substr(name, 1, ?) = ? "
+                                      "GROUP BY name ORDER BY name", (len(prefix), prefix))
+        return rows.fetchall()
+
+    def export(self, solver_dir):
+        """Write the output as the .stdout/.stderr (and .rep<k>) files of the tree. Return the number of benchmarks."""
+        count = 0
+        for name, _ in self.index():
+            stdout_path = os.path.join(solver_dir, name + ".stdout")
+            os.makedirs(os.path.dirname(stdout_path), exist_ok=True)
+            for run, (stdout, stderr) in enumerate(self.get(name), 1):
+                suffix = f".rep{run}" if run > 1 else ""
+                with open(stdout_path + suffix, 'wb') as f:
+                    f.write(stdout)
+                with open(os.path.join(solver_dir, name + ".stderr" + suffix), 'wb') as f:
+                    f.write(stderr)
+            count += 1
+        return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the output tree of packed solver output.")
+    parser.add_argument("command", choices=["export"])
+    parser.add_argument("output_dir", help="Output directory of the run (with the <solver>.outputs.db files)")
+    parser.add_argument("solvers", nargs="+", metavar="solver", help="Solvers whose output to export")
+    args = parser.parse_args()
+
+    for solver in args.solvers:
+        db_file = store_file(args.output_dir, solver)
+        if not os.path.exists(db_file):
+            print(f"No packed output for {solver} in {args.output_dir}", file=sys.stderr)
+            sys.exit(1)
+        count = OutputStore(db_file).export(os.path.join(args.output_dir, solver))
+        print(f"Exported the output of {count} benchmarks to {os.path.join(args.output_dir, solver)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Per-phase resource profile of the wrapper scripts.
+
+The wrappers run each phase of the pipeline (solving, proof post-processing,
+checking) through this script when run_benchmarks.py is started with
+--profile, which sets ARTIFACT_PROFILE in their environment. For each phase it
+logs the wall time, the user and system CPU time and the peak RSS; for proof
+files it logs their size and number of proof steps. The records are written
+to file descriptor 3, which the wrappers point at their own stdout, so they
+end up in the .stdout logs even for phases whose output is redirected:
+
+  [profile] solve wall=1520 user=1480 sys=31 rss_kb=80512
+  [profile] proof bytes=183224 steps=1032
+
+The collectors turn them into the columns solve_wall, solve_user, solve_sys,
+solve_rss_kb, proof_bytes and proof_steps (times in milliseconds).
+
+Usage:
+  python3 phase_profile.py run <phase> <command> [args...]
+  python3 phase_profile.py proof <proof file>
+"""
+
+import os
+import re
+import subprocess
+import sys
+import time
+
+PROFILE_FD = 3
+
+# Proof steps of the CPC (Eunoia) and Alethe formats, and of the numbered veriT format
+PROOF_STEP = re.compile(rb"^\s*(?:\((?:step|assume)\b|\d+:\()", re.MULTILINE)
+
+PROFILE_COLUMN = re.compile(r"^(?:\w+_(?:wall|user|sys|rss_kb)|proof_(?:bytes|steps))$")
+
+def emit(name, values):
+    line = f"[profile] {name} " + " ".join(f"{key}={value}" for key, value in values.items()) + "\n"
+    try:
+        os.write(PROFILE_FD, line.encode())
+    except OSError:
+        sys.stderr.write(line)  # Not started by a wrapper
+
+def run_phase(phase, cmd):
+    """Run cmd with the standard streams of this process and log its profile. Return its exit status."""
+    start = time.monotonic()
+    proc = subprocess.Popen(cmd)
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.monotonic() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    emit(phase, {
+        "wall": int(wall * 1000),
+        "user": int(usage.ru_utime * 1000),
+        "sys": int(usage.ru_stime * 1000),
+        "rss_kb": usage.ru_maxrss,
+    })
+    return proc.returncode if proc.returncode >= 0 else 128 - proc.returncode
+
+def proof_stats(proof_file):
+    """Size in bytes and number of steps of a proof file."""
+    size = 0
+    steps = 0
+    tail = b""
+    with open(proof_file, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            size += len(block)
+            # Count steps in whole lines only; carry the partial last line over
+            data = tail + block
+            cut = data.rfind(b"\n") + 1
+            steps += len(PROOF_STEP.findall(data, 0, cut))
+            tail = data[cut:]
+    steps += len(PROOF_STEP.findall(tail))
+    return size, steps
+
+def parse_line(line):
+    """Turn a [profile] log line into CSV columns."""
+    fields = line.split()
+    name = fields[1]
+    return {f"{name}_{key}": int(value) for key, value in (field.split("=", 1) for field in fields[2:])}
+
+def main():
+    if len(sys.argv) >= 4 and sys.argv[1] == "run":
+        sys.exit(run_phase(sys.argv[2], sys.argv[3:]))
+    if len(sys.argv) == 3 and sys.argv[1] == "proof":
+        try:
+            size, steps = proof_stats(sys.argv[2])
+        except OSError:
+            sys.exit(0)  # No proof was produced
+        emit("proof", {"bytes": size, "steps": steps})
+        sys.exit(0)
+    print(__doc__.split("Usage:")[1], file=sys.stderr)
+    sys.exit(2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Content-addressed store of cvc5 proofs shared by the checker pipelines.
+
+cvc5+leansmt-compiler, cvc5+leansmt+compiler and cvc5+ethos all check a CPC
+proof of the same benchmark. cvc5+ethos.sh always makes its proof through this
+script (solve), so that the cvc5 options the entries are keyed by are the ones
+it runs. When run_benchmarks.py is started with
+--proof_store, which sets ARTIFACT_PROOF_STORE in the environment of the
+wrappers, they fetch the proof through this script instead of running cvc5
+themselves. The first of them to reach a benchmark runs cvc5, with the
+options of cvc5+ethos, and stores the proof under a hash of the benchmark,
+the cvc5 binary and its options; the others wait for it and check the stored
+proof. An entry consists of:
+
+  <key>.cpc    the proof, with the include of the CPC signature that Ethos needs
+  <key>.notes  the warnings found in the proof
+  <key>.time   the solve time in milliseconds
+
+The wrappers report the stored solve time as their own, so all configurations
+check the same proof and agree on its solve time. A proof is only stored if
+cvc5 exits normally; otherwise it is written to the proof directory of the run
+(ARTIFACT_PROOF_DIR), with cvc5's exit status in .status, and checked once.
+
+Entries are made in a .tmp-<key>-* directory next to them, which is removed
+afterwards; those left by a run that was killed are removed under the lock of
+their key by the next fetch in the same directory.
+
+Usage:
+  python3 proof_store.py fetch <store> <benchmark>
+  python3 proof_store.py solve <benchmark> <prefix>
+
+fetch prints the path of the entry without its suffix. solve writes the proof,
+notes and solve time of the benchmark to <prefix>.cpc, .notes and .time without
+storing them, and exits with cvc5's status.
+"""
+
+import fcntl
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from result_cache import hash_file
+
+CVC5 = "/home/user/artifact/cvc5/build/bin/cvc5"
+CPC_SIGNATURE = "/home/user/artifact/cvc5/proofs/eo/cpc/Cpc.eo"
+
+# The options of cvc5 for cvc5+ethos
+CVC5_OPTIONS = ["--enum-inst", "--cegqi-midpoint", "--produce-proofs", "--proof-elim-subtypes", "--dump-proofs",
+                "--proof-format=cpc", "--proof-granularity=dsl-rewrite"]
+
+# Drop the first two lines and the last line of the cvc5 output. In the same
+# pass, note the warnings in the proof and whether it has any steps.
+STRIP_PROOF = """
+    NR > 3 {
+        print prev
+        if (prev ~ /WARNING/) print prev > notes
+        if (prev ~ /step|assume/) steps = 1
+    }
+    NR > 2 { prev = $0 }
+    END { if (!steps) print "; WARNING: Empty proof" > notes }"""
+
+PROFILER = "/home/user/artifact/phase_profile.py"
+
+# The wrappers send profile records to their log through this descriptor
+PROFILE_FD = 3
+
+def entry_key(benchmark):
+    """Hash of the benchmark, the cvc5 binary (by size and modification time) and its options."""
+    digest = hash_file(benchmark)
+    try:
+        stat = os.stat(CVC5)
+        digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    except OSError:
+        pass
+    digest.update(" ".join([CVC5] + CVC5_OPTIONS).encode())
+    return digest.hexdigest()
+
+def profiled(phase, cmd):
+    if os.environ.get("ARTIFACT_PROFILE"):
+        return [sys.executable, PROFILER, "run", phase] + cmd
+    return cmd
+
+def profile_fds():
+    try:
+        os.fstat(PROFILE_FD)
+        return (PROFILE_FD,)
+    except OSError:
+        return ()
+
+def generate(benchmark, prefix):
+    """
+    Write the proof, notes and solve time of the benchmark to prefix.cpc,
+    .notes and .time. Return cvc5's status, as a shell reports it.
+    """
+    open(prefix + ".notes", 'w').close()
+    start = time.monotonic()
+    with open(prefix + ".cpc", 'w') as proof:
+        proof.write(f"(include \"{CPC_SIGNATURE}\")\n")
+        proof.flush()
+        solver = subprocess.Popen(profiled("solve", [CVC5] + CVC5_OPTIONS + [benchmark]), stdout=subprocess.PIPE,
+                                  pass_fds=profile_fds())
+        strip = subprocess.run(profiled("postprocess", ["awk", "-v", f"notes={prefix}.notes", STRIP_PROOF]),
+                               stdin=solver.stdout, stdout=proof, pass_fds=profile_fds())
+        solver.stdout.close()
+        code = solver.wait()
+    with open(prefix + ".time", 'w') as f:
+        f.write(f"{int((time.monotonic() - start) * 1000)}\n")
+    code = code if strip.returncode == 0 else strip.returncode
+    return code if code >= 0 else 128 - code
+
+def sweep(shard, key):
+    """
+    Remove the .tmp- directories in shard left by runs that were killed: those
+    of key, whose lock the caller holds, and those of keys nobody holds.
+    """
+    for name in os.listdir(shard):
+        if not name.startswith(".tmp-"):
+            continue
+        other = name[len(".tmp-"):].rsplit("-", 1)[0]
+        if other == key:
+            shutil.rmtree(os.path.join(shard, name), ignore_errors=True)
+            continue
+        try:
+            with open(os.path.join(shard, other + ".lock"), 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                shutil.rmtree(os.path.join(shard, name), ignore_errors=True)
+        except OSError:
+            pass  # Its proof is being made
+
+def fetch(store, benchmark):
+    """Return the entry prefix of the proof of the benchmark, running cvc5 first if it is not stored."""
+    key = entry_key(benchmark)
+    prefix = os.path.join(store, key[:2], key)
+    os.makedirs(os.path.dirname(prefix), exist_ok=True)
+    with open(prefix + ".lock", 'w') as lock:
+        # Configurations that reach the benchmark while its proof is made wait for it
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if os.path.exists(prefix + ".time"):
+            return prefix
+
+        sweep(os.path.dirname(prefix), key)
+        tmp = tempfile.mkdtemp(dir=os.path.dirname(prefix), prefix=f".tmp-{key}-")
+        try:
+            code = generate(benchmark, os.path.join(tmp, "proof"))
+            if code != 0:
+                # Possibly hit a limit of this run: check it once, but do not store it
+                private = tempfile.mkdtemp(prefix="proof-", dir=os.environ.get("ARTIFACT_PROOF_DIR"))
+                for suffix in (".cpc", ".notes", ".time"):
+                    shutil.move(os.path.join(tmp, "proof" + suffix), os.path.join(private, "proof" + suffix))
+                # The wrappers exit with it, so that an out-of-memory cvc5 is noticed
+                with open(os.path.join(private, "proof.status"), 'w') as f:
+                    f.write(f"{code}\n")
+                return os.path.join(private, "proof")
+            # The time file marks a complete entry, so it goes last
+            for suffix in (".cpc", ".notes", ".time"):
+                os.replace(os.path.join(tmp, "proof" + suffix), prefix + suffix)
+            return prefix
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "fetch":
+        print(fetch(sys.argv[2], sys.argv[3]))
+        sys.exit(0)
+    if len(sys.argv) == 4 and sys.argv[1] == "solve":
+        sys.exit(generate(sys.argv[2], sys.argv[3]))
+    print(__doc__.split("Usage:")[1], file=sys.stderr)
+    sys.exit(2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Content-addressed cache of solver results for run_benchmarks.py.
+
+A result is stored under a hash of the benchmark file, the wrapper script and
+the tool binaries it calls, and the timeout and memory limit. Rerunning an
+unchanged configuration then returns the stored stdout, stderr and exit status
+instead of running the solver again.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+# Outcomes that depend on the harness rather than on the solver
+UNCACHEABLE = ("ERROR", "INVALID_SOLVER")
+
+def hash_file(path, digest=None):
+    digest = digest or hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest
+
+def tool_digest(solver, files):
+    """Hash the wrapper script and binaries of a solver; missing files count by name."""
+    digest = hashlib.sha256(solver.encode())
+    for path in files:
+        digest.update(path.encode())
+        if os.path.isfile(path):
+            hash_file(path, digest)
+    return digest.hexdigest()
+
+class ResultCache:
+    def __init__(self, root, tools):
+        self.root = Path(root)
+        self.tools = tools
+
+    def key(self, benchmark_path, timeout, memout_mb):
+        digest = hash_file(benchmark_path)
+        digest.update(f"{self.tools}:{timeout}:{memout_mb}".encode())
+        return digest.hexdigest()
+
+    def entry(self, key):
+        return self.root / key[:2] / key
+
+    def get(self, key, stdout_path, stderr_path):
+        """Copy a stored result to the given output files and return (code, usage), or None."""
+        entry = self.entry(key)
+        try:
+            with open(entry / "meta.json", 'r') as f:
+                meta = json.load(f)
+            shutil.copyfile(entry / "stdout", stdout_path)
+            shutil.copyfile(entry / "stderr", stderr_path)
+        except (OSError, ValueError):
+            return None
+        # The modification time orders entries for eviction
+        os.utime(entry / "meta.json")
+        return meta["code"], meta["usage"]
+
+    def put(self, key, code, stdout_path, stderr_path, usage):
+        if code in UNCACHEABLE:
+            return
+        entry = self.entry(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=entry.parent, prefix=".tmp-"))
+        try:
+            shutil.copyfile(stdout_path, tmp / "stdout")
+            shutil.copyfile(stderr_path, tmp / "stderr")
+            with open(tmp / "meta.json", 'w') as f:
+                json.dump({"code": code, "usage": usage}, f)
+            os.rename(tmp, entry)
+        except OSError:
+            # Another worker stored the same key first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def discard(self, key):
+        shutil.rmtree(self.entry(key), ignore_errors=True)
+
+    def evict(self, max_mb):
+        """Remove least recently used entries until the cache fits in max_mb. Return the number removed."""
+        entries = []
+        total = 0
+        for meta in self.root.glob("*/*/meta.json"):
+            entry = meta.parent
+            size = sum(f.stat().st_size for f in entry.iterdir())
+            entries.append((meta.stat().st_mtime, size, entry))
+            total += size
+        removed = 0
+        for _, size, entry in sorted(entries):
+            if total <= max_mb * 1024 * 1024:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            try:
+                entry.parent.rmdir()
+            except OSError:
+                pass  # Still holds other entries
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,197 @@
+"""Precomputed row indexes and vectorized kernels over loaded runs.
+
+A RunIndex holds, for one run, the row offsets of every SMT-LIB logic and
+family (or Seventeen module) as NumPy arrays, together with the per-row
+cactus time and the solved/checked masks of tables.py. A cactus curve or a
+table row for any selection is then an np.sort/np.cumsum or a count over an
+index slice, so breaking the results down by logic costs about as much as a
+single breakdown. Runs have one row per benchmark.
+
+The index also keeps the time at which each benchmark was solved and at which
+it was done (the exit of the wrapper, or the end of its last phase for runs
+without it). A benchmark counts as solved or checked at a shorter virtual
+timeout if that happened within it, so the results of one long run can be
+cut at any number of timeouts with a binary search per run, without running
+anything again. Virtual timeouts above the one of the run give its results.
+"""
+
+import numpy as np
+import pandas as pd
+
+from results_store import PHASES, TIME_PHASES, total_time
+
+GROUP_COLUMNS = ["logic", "family"]
+
+EMPTY = np.empty(0, dtype=np.intp)
+
+# Phase whose end makes a benchmark count as solved (see status_masks)
+SOLVED_PHASE = {"check": "solve", "kernel": "load", "solve": "solve"}
+
+def group_offsets(column):
+    """Map each value of a categorical column to the offsets of its rows."""
+    codes = column.cat.codes.to_numpy()
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(column.cat.categories) + 1))
+    return {value: order[bounds[i]:bounds[i + 1]]
+            for i, value in enumerate(column.cat.categories) if value and bounds[i] < bounds[i + 1]}
+
+def status_masks(df, kind):
+    """Compute the solved, checked and checked-without-holes rows as in tables.py."""
+    holes = df['holes'].to_numpy(bool)
+    solve = df['solve'].notna().to_numpy()
+    if kind == "check":
+        check = df['check'].notna().to_numpy()
+        result = df['result']
+        solved = ((result == 'unsat').to_numpy() | holes |
+                  (result.isna().to_numpy() & solve & ~check))
+        checked = solved & check
+    elif kind == "kernel":
+        solved = df['load'].notna().to_numpy()
+        checked = solved & df['kernel'].notna().to_numpy()
+    else:
+        solved = solve
+        checked = solved & solve
+    return solved, checked, checked & ~holes
+
+def finish_times(df, kind):
+    """Milliseconds after its start at which each benchmark was solved and at which it was done."""
+    phases = PHASES[kind]
+    elapsed = df[phases].astype(float).fillna(0).cumsum(axis=1).to_numpy()
+    done_at = elapsed[:, -1]
+    if 'exit' in df.columns:
+        done_at = np.fmax(done_at, df['exit'].to_numpy(dtype=float, na_value=np.nan))
+    if SOLVED_PHASE[kind] == phases[-1]:
+        return done_at, done_at
+    return elapsed[:, phases.index(SOLVED_PHASE[kind])], done_at
+
+def quartile_time(df, kind, quartile):
+    """Time of each row with its phases at the given quartile over the --repeat runs (q1 or q3)."""
+    columns = [f"{phase}_{quartile}" if f"{phase}_{quartile}" in df.columns else phase for phase in TIME_PHASES[kind]]
+    return df[columns].astype(float).fillna(0).sum(axis=1).to_numpy()
+
+def count_within(finished, timeouts):
+    """Number of the finish times that are within each timeout in milliseconds."""
+    return np.searchsorted(np.sort(finished), timeouts, side="right")
+
+class RunIndex:
+    def __init__(self, df, kind):
+        self.kind = kind
+        self.size = len(df)
+        self.benchmark = df['benchmark']
+        self.time = total_time(df, kind).to_numpy(dtype=float)
+        self.unsat = (df['result'] == 'unsat').to_numpy()
+        self.solved, self.checked, self.checked_no_holes = status_masks(df, kind)
+        self.solved_at, self.done_at = finish_times(df, kind)
+        self.spread = None
+        if 'repeats' in df.columns:
+            self.spread = (quartile_time(df, kind, "q1"), quartile_time(df, kind, "q3"))
+        self.groups = {column: group_offsets(df[column]) for column in GROUP_COLUMNS}
+        self.filters = {}
+
+    def filter_mask(self, benchmark_filter):
+        if benchmark_filter not in self.filters:
+            self.filters[benchmark_filter] = self.benchmark.str.contains(benchmark_filter).to_numpy(bool)
+        return self.filters[benchmark_filter]
+
+    def rows(self, column=None, value=None, benchmark_filter=None):
+        """Offsets of the rows with the given logic/family value that match the filter."""
+        rows = self.groups[column].get(value, EMPTY) if column else np.arange(self.size)
+        if benchmark_filter:
+            rows = rows[self.filter_mask(benchmark_filter)[rows]]
+        return rows
+
+    def cactus_curve(self, rows, timeout=None):
+        """Cumulative time in seconds of the unsat benchmarks among rows, fastest first."""
+        rows = rows[self.unsat[rows]]
+        if timeout is not None:
+            rows = rows[self.done_at[rows] <= timeout * 1000]
+        return np.cumsum(np.sort(self.time[rows])) / 1000
+
+    def cactus_band(self, rows, timeout=None):
+        """Cumulative first and third quartile times along the cactus curve of rows."""
+        rows = rows[self.unsat[rows]]
+        if timeout is not None:
+            rows = rows[self.done_at[rows] <= timeout * 1000]
+        rows = rows[np.argsort(self.time[rows], kind="stable")]
+        return tuple(np.cumsum(quartile[rows]) / 1000 for quartile in self.spread)
+
+    def counts(self, rows, timeout=None):
+        """Solved, checked and checked-without-holes counts among rows."""
+        if timeout is not None:
+            return tuple(int(count[0]) for count in self.sweep(rows, [timeout]))
+        return (int(np.count_nonzero(self.solved[rows])), int(np.count_nonzero(self.checked[rows])),
+                int(np.count_nonzero(self.checked_no_holes[rows])))
+
+    def sweep(self, rows, timeouts):
+        """Solved, checked and checked-without-holes counts among rows at each timeout in seconds."""
+        timeouts = np.asarray(timeouts, dtype=float) * 1000
+        return (count_within(self.solved_at[rows[self.solved[rows]]], timeouts),
+                count_within(self.done_at[rows[self.checked[rows]]], timeouts),
+                count_within(self.done_at[rows[self.checked_no_holes[rows]]], timeouts))
+
+def index_runs(runs):
+    """Build the index of every run loaded by results_store.load_runs."""
+    return {name: RunIndex(df, kind) for name, (df, kind) in runs.items()}
+
+def group_values(indexes, column):
+    """All values of a group column that occur in any of the runs, sorted."""
+    return sorted(set().union(*(index.groups[column] for index in indexes.values())))
+
+def cactus_curves(indexes, column=None, value=None, benchmark_filter=None, timeout=None):
+    """Cactus curves of every run with at least one unsat benchmark in the selection, by run name."""
+    curves = {}
+    for name in sorted(indexes):
+        index = indexes[name]
+        curve = index.cactus_curve(index.rows(column, value, benchmark_filter), timeout)
+        if len(curve):
+            curves[name] = curve
+    return curves
+
+def cactus_bands(indexes, column=None, value=None, benchmark_filter=None, timeout=None):
+    """Quartile bands of the cactus curves of the runs made with --repeat, by run name."""
+    bands = {}
+    for name in sorted(indexes):
+        index = indexes[name]
+        if index.spread is not None:
+            band = index.cactus_band(index.rows(column, value, benchmark_filter), timeout)
+            if len(band[0]):
+                bands[name] = band
+    return bands
+
+def summary_table(indexes, column=None, value=None, benchmark_filter=None, timeout=None):
+    """The table of tables.py for a selection, and its number of benchmarks."""
+    table_data = []
+    total = None
+    for name, index in indexes.items():
+        rows = index.rows(column, value, benchmark_filter)
+        solved, checked, checked_no_holes = index.counts(rows, timeout)
+        if total is None:
+            total = len(rows)
+        table_data.append({
+            "Solver+Checker": name,
+            "Solved": solved,
+            "Checked": checked,
+            "Checked (no holes)": checked_no_holes
+        })
+    return pd.DataFrame(table_data), total
+
+def timeout_sweep(indexes, timeouts, column=None, value=None, benchmark_filter=None):
+    """The table of tables.py at each virtual timeout in seconds, and the number of benchmarks."""
+    table_data = []
+    total = None
+    for name, index in indexes.items():
+        rows = index.rows(column, value, benchmark_filter)
+        if total is None:
+            total = len(rows)
+        for timeout, solved, checked, checked_no_holes in zip(timeouts, *index.sweep(rows, timeouts)):
+            table_data.append({
+                "Timeout": f"{timeout:g}",
+                "Solver+Checker": name,
+                "Solved": int(solved),
+                "Checked": int(checked),
+                "Checked (no holes)": int(checked_no_holes)
+            })
+    table = pd.DataFrame(table_data)
+    if len(table):
+        table = table.sort_values("Timeout", key=lambda column: column.astype(float), kind="stable")
+    return table.reset_index(drop=True), total
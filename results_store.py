@@ -0,0 +1,154 @@
+"""Typed columnar store for the benchmark CSVs.
+
+Every CSV under a data directory (one per solver run) is converted to an Arrow
+IPC file next to it, with a fixed schema:
+
+  benchmark   normalized benchmark key, relative to the suite directory
+              (e.g. non-incremental/QF_UF/family/file.smt2)
+  solver      solver+checker name, taken from the CSV file name
+  logic       SMT-LIB logic (empty for Seventeen)
+  family      SMT-LIB family or Seventeen module
+  result      result as parsed from the logs
+  holes       whether the proof had holes
+  solve, ...  phase timings in integer milliseconds
+  exit        wall time of the wrapper process in milliseconds, for runs
+              made since run_benchmarks.py logs it
+  solve_q1, solve_q3, ..., repeats
+              quartiles of each phase and number of runs, for runs made
+              with --repeat (the phase columns then hold the medians)
+  solve_wall, ..., proof_steps
+              per-phase profile of runs made with --profile (see
+              phase_profile.py), when the CSV has it
+
+The phases a run reports (and hence how its total time is computed) are kept
+in the table metadata instead of being guessed from the columns. cactus.py,
+tables.py and scatter.py read the store through load_runs, memory-mapping the
+Arrow files and falling back to the CSVs where no up-to-date file exists.
+
+Usage:
+  python3 results_store.py <data directory>
+"""
+
+import argparse
+import glob
+import os
+import re
+
+import pandas as pd
+import pyarrow as pa
+
+from phase_profile import PROFILE_COLUMN
+
+# Phases each kind of run reports, in the order they happen
+PHASES = {
+    "check": ["solve", "check"],
+    "kernel": ["solve", "load", "reconstruct", "kernel"],
+    "solve": ["solve"],
+}
+
+# Phases counted in the solving + checking time of cactus.py (without loading)
+TIME_PHASES = {
+    "check": ["solve", "check"],
+    "kernel": ["solve", "reconstruct", "kernel"],
+    "solve": ["solve"],
+}
+
+# Phases that make up the total checking time, as plotted by scatter.py
+CHECK_PHASES = {
+    "check": ["check"],
+    "kernel": ["load", "reconstruct", "kernel"],
+    "solve": [],
+}
+
+CATEGORICAL = ["solver", "logic", "family", "result"]
+
+# Quartiles of the phases over the repetitions of --repeat runs
+SPREAD_COLUMN = re.compile(r"^(?:(?:solve|check|load|reconstruct|kernel)_q[13]|repeats)$")
+
+LOG_SUFFIX = re.compile(r"(\.stdout|/mirabelle/mirabelle\.log)$")
+
+def run_kind(columns):
+    """Classify a CSV by the phase columns it has."""
+    if 'check' in columns:
+        return "check"
+    if 'kernel' in columns:
+        return "kernel"
+    return "solve"
+
+def benchmark_keys(paths, solver):
+    """
+    Strip the output directory, solver, suite and log suffix from the log
+    paths, e.g. .../output/all/cvc5+ethos/SMT-LIB/non-incremental/QF_UF/f/x.smt2.stdout
+    becomes non-incremental/QF_UF/f/x.smt2.
+    """
+    keys = paths.str.replace(LOG_SUFFIX, "", regex=True)
+    rel = keys.str.extract(f"/{re.escape(solver)}/[^/]+/(.*)$", expand=False)
+    return rel.fillna(keys)
+
+def normalize(df, solver):
+    """Convert a CSV as written by the collectors to the store schema."""
+    kind = run_kind(df.columns)
+    out = pd.DataFrame({"benchmark": benchmark_keys(df['benchmark'].astype(str), solver)})
+    out['solver'] = solver
+    parts = out['benchmark'].str.split('/', expand=True).reindex(columns=range(3))
+    smtlib = parts[0] == "non-incremental"
+    out['logic'] = parts[1].where(smtlib, "")
+    out['family'] = parts[2].where(smtlib, parts[2].where(parts[0] == "baseline_probs", ""))
+    out['result'] = df['result']
+    out['holes'] = df['holes'] == 1
+    for phase in PHASES[kind]:
+        out[phase] = df[phase].astype("Int64")
+    if 'exit' in df.columns:
+        out['exit'] = df['exit'].astype("Int64")
+    for column in df.columns:
+        if PROFILE_COLUMN.match(column) or SPREAD_COLUMN.match(column):
+            out[column] = df[column].astype("Int64")
+    for column in CATEGORICAL:
+        out[column] = out[column].astype("category")
+    return out, kind
+
+def write_arrow(df, kind, arrow_file):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**table.schema.metadata, b"kind": kind.encode()})
+    tmp_file = arrow_file + ".tmp"
+    with pa.OSFile(tmp_file, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_file, arrow_file)
+
+def read_arrow(arrow_file):
+    with pa.memory_map(arrow_file, 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(), table.schema.metadata[b"kind"].decode()
+
+def solver_name(csv_file):
+    return os.path.basename(csv_file).split('.')[0]  # Use file name as checker ID
+
+def build_store(data_dir):
+    """Convert every CSV below data_dir into an Arrow file next to it."""
+    for csv_file in sorted(glob.glob(os.path.join(data_dir, "**", "*.csv"), recursive=True)):
+        df, kind = normalize(pd.read_csv(csv_file), solver_name(csv_file))
+        write_arrow(df, kind, csv_file[:-len(".csv")] + ".arrow")
+        print(f"Stored {csv_file} ({len(df)} rows, {kind})")
+
+def load_run(csv_file):
+    """Load one run as (df, kind), from its Arrow file if it is up to date."""
+    arrow_file = csv_file[:-len(".csv")] + ".arrow"
+    if os.path.exists(arrow_file) and os.path.getmtime(arrow_file) >= os.path.getmtime(csv_file):
+        return read_arrow(arrow_file)
+    return normalize(pd.read_csv(csv_file), solver_name(csv_file))
+
+def load_runs(file_pattern):
+    """Load every run whose CSV matches file_pattern, keyed by solver name."""
+    return {solver_name(csv_file): load_run(csv_file) for csv_file in glob.glob(file_pattern)}
+
+def total_time(df, kind, phases=TIME_PHASES):
+    """Sum the phases of a run, counting missing timings as 0."""
+    return df[phases[kind]].fillna(0).sum(axis=1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert benchmark CSVs into typed Arrow files.")
+    parser.add_argument("data_dir", type=str, help="Directory containing the CSV files (searched recursively).")
+    args = parser.parse_args()
+
+    build_store(args.data_dir)
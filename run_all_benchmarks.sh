@@ -11,6 +11,18 @@ JOBS=4                 # Parallel jobs
 TIMEOUT=60             # Default timeout (seconds)
 MEMOUT=8192            # Default memory limit (MB)
 SLEDGEHAMMER=0         # Disabled by default
+WARM=""                # Cold checker process per benchmark by default
+RESUME=""              # Start from scratch by default
+CACHE=""               # No result cache by default
+PROFILE=""             # No per-phase profile by default
+PROOF_DIR=""           # Proof files in the system temporary directory by default
+PROOF_STORE=""         # cvc5 runs once per configuration by default
+OUTPUT_STORE=""        # A .stdout and .stderr file per benchmark by default
+MEM_RESERVE=""         # Start benchmarks whenever a job is free by default
+METRICS=""             # No live metrics by default
+ORDER=""               # Benchmarks in list order by default
+STRATIFIED=0           # First N benchmarks of each list by default
+SEED=0                 # Seed of the stratified sample
 
 # “All” benchmark files:
 SMTLIB_ALL="/home/user/artifact/smtlib_all.txt"
@@ -30,6 +42,22 @@ usage() {
   echo "  --timeout <T>                          Per-benchmark timeout (seconds)."
   echo "  --memout <M>                           Per-benchmark memory limit (MB)."
   echo "  --enable-sledgehammer                  Enable verit+sledgehammer (default: off)."
+  echo "  --warm                                 Keep Lean-SMT checkers loaded between benchmarks"
+  echo "                                         (no effect with the shipped checker, which has no --server)."
+  echo "  --resume                               Keep previous output and skip finished benchmarks."
+  echo "  --rerun-failed                         With --resume, rerun TIMEOUT and ERROR benchmarks."
+  echo "  --cache <DIR>                          Reuse results of unchanged runs stored in DIR."
+  echo "  --profile                              Record per-phase CPU time, peak RSS and proof size."
+  echo "  --proof-dir <DIR>                      Keep proof files in DIR, e.g. the tmpfs /dev/shm."
+  echo "  --proof-store <DIR>                    Run cvc5 once per benchmark and share its proof through DIR"
+  echo "                                         (Lean-SMT solves in place with the shipped checker, which has no --proof)."
+  echo "  --pack-output                          Pack the output of each solver into one compressed database."
+  echo "  --mem-reserve <MB>                     Only start benchmarks while MB of memory stays available."
+  echo "  --metrics-port <PORT>                  Serve live Prometheus metrics on localhost:PORT/metrics."
+  echo "  --metrics-file <FILE>                  Keep live Prometheus metrics in FILE (textfile exporter)."
+  echo "  --longest-first                        Run the benchmarks expected to take longest first."
+  echo "  --stratified                           Sample the SMT-LIB benchmarks by logic, family and difficulty."
+  echo "  --seed <S>                             Seed of the stratified sample (default: 0)."
   echo "  -h, --help                             Show this message."
   echo ""
   echo "Examples:"
@@ -67,6 +95,55 @@ while [ $# -gt 0 ]; do
     --enable-sledgehammer)
       SLEDGEHAMMER=1
       ;;
+    --warm)
+      WARM="--warm"
+      ;;
+    --resume)
+      RESUME="--resume"
+      ;;
+    --rerun-failed)
+      RESUME="--resume --rerun_failed"
+      ;;
+    --cache)
+      shift
+      CACHE="--cache_dir $1"
+      ;;
+    --profile)
+      PROFILE="--profile"
+      ;;
+    --proof-dir)
+      shift
+      PROOF_DIR="--proof_dir $1"
+      ;;
+    --pack-output)
+      OUTPUT_STORE="--output_store"
+      ;;
+    --proof-store)
+      shift
+      PROOF_STORE="--proof_store $1"
+      ;;
+    --mem-reserve)
+      shift
+      MEM_RESERVE="--mem_reserve $1"
+      ;;
+    --metrics-port)
+      shift
+      METRICS="$METRICS --metrics_port $1"
+      ;;
+    --metrics-file)
+      shift
+      METRICS="$METRICS --metrics_file $1"
+      ;;
+    --longest-first)
+      ORDER="--order longest"
+      ;;
+    --stratified)
+      STRATIFIED=1
+      ;;
+    --seed)
+      shift
+      SEED="$1"
+      ;;
     -h|--help)
       usage
       ;;
@@ -124,6 +201,8 @@ esac
 # If mode=all, use the “*_all.txt” files directly (no subsetting).
 # If we have a named mode (smoke, minimal, brief), create e.g. “seventeen_smt2_brief.txt” from head -n N.
 # If no mode, create e.g. “seventeen_smt2_50.txt” (where 50 is the chosen count).
+# With --stratified, the SMT-LIB list is a stratified sample (see sample_benchmarks.py)
+# instead; the Seventeen lists stay in step, as their SMT2 and FOF lines pair up.
 ###############################################################################
 if [ "$MODE" = "all" ]; then
   SEVENTEEN_SMT2_FILE="$SEVENTEEN_SMT2_ALL"
@@ -145,7 +224,11 @@ else
   # Generate from the “full” files
   head -n "$N" "$SEVENTEEN_SMT2_ALL" > "$SEVENTEEN_SMT2_FILE"
   head -n "$N" "$SEVENTEEN_FOF_ALL" > "$SEVENTEEN_FOF_FILE"
-  head -n "$N" "$SMTLIB_ALL"        > "$SMTLIB_FILE"
+  if [ "$STRATIFIED" -eq 1 ]; then
+    python3 sample_benchmarks.py sample "$SMTLIB_ALL" "$SMTLIB_FILE" --count "$N" --seed "$SEED"
+  else
+    head -n "$N" "$SMTLIB_ALL"        > "$SMTLIB_FILE"
+  fi
 fi
 
 ###############################################################################
@@ -159,7 +242,10 @@ FIGURES_DIR="/home/user/artifact/figures/$RUN_ID"
 OUTPUT_DIR="/home/user/artifact/output/$RUN_ID"
 TABLES_DIR="/home/user/artifact/tables/$RUN_ID"
 
-rm -rf "$DATA_DIR" "$FIGURES_DIR" "$OUTPUT_DIR" "$TABLES_DIR"
+if [ -z "$RESUME" ]; then
+  rm -rf "$DATA_DIR" "$OUTPUT_DIR"
+fi
+rm -rf "$FIGURES_DIR" "$TABLES_DIR"
 mkdir -p "$DATA_DIR" "$FIGURES_DIR" "$OUTPUT_DIR" "$TABLES_DIR"
 
 # Set unlimited stack size
@@ -176,35 +262,29 @@ run_seventeen_benchmarks() {
   local memout="$5"
   local sledge="$6"
 
-  # Always 60s for cvc5+leansmt-compiler
-  python3 run_benchmarks.py "$smt2_file" cvc5+leansmt-compiler \
-    --jobs "$jobs" --timeout "$timeout" --memout "$memout" \
-    --output_dir "$OUTPUT_DIR"
-  python3 collect_leansmt_stats.py "$OUTPUT_DIR/cvc5+leansmt-compiler/seventeen" "$DATA_DIR/seventeen/cvc5+leansmt-compiler.csv"
+  # Sledgehammer if enabled, one benchmark at a time next to the Lean-SMT runs
+  local sledgehammer=""
+  if [ "$sledge" -eq 1 ]; then
+    sledgehammer="verit+sledgehammer --solver_limits verit+sledgehammer:1200:16384:1"
+  fi
 
-  # Always 60s for cvc5+leansmt+compiler
-  python3 run_benchmarks.py "$smt2_file" cvc5+leansmt+compiler \
+  # Always 60s for cvc5+leansmt-compiler and cvc5+leansmt+compiler, in one shared pool
+  python3 run_benchmarks.py "$smt2_file" cvc5+leansmt-compiler cvc5+leansmt+compiler $sledgehammer \
     --jobs "$jobs" --timeout "$timeout" --memout "$memout" \
-    --output_dir "$OUTPUT_DIR"
+    --output_dir "$OUTPUT_DIR" $RESUME $CACHE $PROFILE $OUTPUT_STORE $MEM_RESERVE $METRICS $PROOF_DIR $PROOF_STORE $ORDER $WARM
+  python3 collect_leansmt_stats.py "$OUTPUT_DIR/cvc5+leansmt-compiler/seventeen" "$DATA_DIR/seventeen/cvc5+leansmt-compiler.csv"
   python3 collect_leansmt_stats.py "$OUTPUT_DIR/cvc5+leansmt+compiler/seventeen" "$DATA_DIR/seventeen/cvc5+leansmt+compiler.csv"
+  if [ "$sledge" -eq 1 ]; then
+    python3 collect_sledgehammer_stats.py "$OUTPUT_DIR/verit+sledgehammer/seventeen" "$DATA_DIR/seventeen/verit+sledgehammer.csv"
+  fi
 
   # Always 60s for duper
   python3 run_benchmarks.py "$fof_file" duper \
     --jobs "$jobs" --timeout "$timeout" --memout "$memout" \
-    --output_dir "$OUTPUT_DIR"
+    --output_dir "$OUTPUT_DIR" $RESUME $CACHE $PROFILE $OUTPUT_STORE $MEM_RESERVE $METRICS $PROOF_DIR $ORDER
   python3 collect_duper_stats.py "$OUTPUT_DIR/duper/seventeen" "$DATA_DIR/seventeen/duper.csv"
 
-  # Sledgehammer if enabled
-  if [ "$sledge" -eq 1 ]; then
-    python3 run_benchmarks.py "$smt2_file" verit+sledgehammer \
-      --jobs 1 --timeout 1200 --memout 16384 \
-      --output_dir "$OUTPUT_DIR"
-    python3 collect_sledgehammer_stats.py "$OUTPUT_DIR/verit+sledgehammer/seventeen" "$DATA_DIR/seventeen/verit+sledgehammer.csv"
-  fi
-
-  # Summaries
-  python3 tables.py "$DATA_DIR/seventeen" "$TABLES_DIR/seventeen.tex"
-  python3 cactus.py "$DATA_DIR/seventeen" "$FIGURES_DIR/seventeen.pdf"
+  python3 results_store.py "$DATA_DIR/seventeen"
 }
 
 run_smtlib_benchmarks() {
@@ -213,37 +293,16 @@ run_smtlib_benchmarks() {
   local timeout="$3"
   local memout="$4"
 
-  # cvc5+leansmt-compiler
-  python3 run_benchmarks.py "$smt_file" cvc5+leansmt-compiler \
+  # All four configurations in one shared pool
+  python3 run_benchmarks.py "$smt_file" cvc5+leansmt-compiler cvc5+leansmt+compiler cvc5+ethos verit+smtcoq \
     --jobs "$jobs" --timeout "$timeout" --memout "$memout" \
-    --output_dir "$OUTPUT_DIR"
+    --output_dir "$OUTPUT_DIR" $RESUME $CACHE $PROFILE $OUTPUT_STORE $MEM_RESERVE $METRICS $PROOF_DIR $PROOF_STORE $ORDER $WARM
   python3 collect_leansmt_stats.py "$OUTPUT_DIR/cvc5+leansmt-compiler/SMT-LIB" "$DATA_DIR/SMT-LIB/cvc5+leansmt-compiler.csv"
-
-  # cvc5+leansmt+compiler
-  python3 run_benchmarks.py "$smt_file" cvc5+leansmt+compiler \
-    --jobs "$jobs" --timeout "$timeout" --memout "$memout" \
-    --output_dir "$OUTPUT_DIR"
   python3 collect_leansmt_stats.py "$OUTPUT_DIR/cvc5+leansmt+compiler/SMT-LIB" "$DATA_DIR/SMT-LIB/cvc5+leansmt+compiler.csv"
-
-  # cvc5+ethos
-  python3 run_benchmarks.py "$smt_file" cvc5+ethos \
-    --jobs "$jobs" --timeout "$timeout" --memout "$memout" \
-    --output_dir "$OUTPUT_DIR"
   python3 collect_ethos_stats.py "$OUTPUT_DIR/cvc5+ethos/SMT-LIB" "$DATA_DIR/SMT-LIB/cvc5+ethos.csv"
-
-  # verit+smtcoq
-  python3 run_benchmarks.py "$smt_file" verit+smtcoq \
-    --jobs "$jobs" --timeout "$timeout" --memout "$memout" \
-    --output_dir "$OUTPUT_DIR"
   python3 collect_smtcoq_stats.py "$OUTPUT_DIR/verit+smtcoq/SMT-LIB" "$DATA_DIR/SMT-LIB/verit+smtcoq.csv"
 
-  # Summaries
-  python3 tables.py "$DATA_DIR/SMT-LIB" "$TABLES_DIR/SMT-LIB.tex"
-  python3 tables.py --benchmark_filter QF_ "$DATA_DIR/SMT-LIB" "$TABLES_DIR/QF_SMT-LIB.tex"
-  python3 cactus.py "$DATA_DIR/SMT-LIB" "$FIGURES_DIR/SMT-LIB.pdf"
-  python3 cactus.py --benchmark_filter QF_ "$DATA_DIR/SMT-LIB" "$FIGURES_DIR/SMT-LIB_QF.pdf"
-  python3 scatter.py "$DATA_DIR/SMT-LIB/cvc5+leansmt-compiler.csv" "$DATA_DIR/SMT-LIB/cvc5+ethos.csv" "$FIGURES_DIR/scatter-compiler.pdf"
-  python3 scatter.py "$DATA_DIR/SMT-LIB/cvc5+leansmt+compiler.csv" "$DATA_DIR/SMT-LIB/cvc5+ethos.csv" "$FIGURES_DIR/scatter+compiler.pdf"
+  python3 results_store.py "$DATA_DIR/SMT-LIB"
 }
 
 ###############################################################################
@@ -258,6 +317,8 @@ echo "Timeout: $TIMEOUT"
 echo "Memout: $MEMOUT"
 echo "Jobs: $JOBS"
 echo "Sledgehammer: $SLEDGEHAMMER"
+echo "Warm checkers: ${WARM:-off}"
+echo "Resume: ${RESUME:-off}"
 
 # Subdirectories for Seventeen
 run_seventeen_benchmarks "$SEVENTEEN_SMT2_FILE" "$SEVENTEEN_FOF_FILE" "$JOBS" 60 8192 "$SLEDGEHAMMER"
@@ -265,6 +326,12 @@ run_seventeen_benchmarks "$SEVENTEEN_SMT2_FILE" "$SEVENTEEN_FOF_FILE" "$JOBS" 60
 # Subdirectories for SMT-LIB
 run_smtlib_benchmarks "$SMTLIB_FILE" "$JOBS" "$TIMEOUT" "$MEMOUT"
 
+# Summaries of both suites, as generate_figures_and_tables.sh makes them from the data
+./generate_figures_and_tables.sh "$RUN_ID"
+if [ "$STRATIFIED" -eq 1 ] && [ "$MODE" != "all" ]; then
+  python3 sample_benchmarks.py estimate "$SMTLIB_FILE" "$DATA_DIR/SMT-LIB" --output "$TABLES_DIR/SMT-LIB_estimates.tex"
+fi
+
 echo "All benchmarks completed."
 echo "Results stored in:"
 echo "  $OUTPUT_DIR"
@@ -1,14 +1,31 @@
 import argparse
+import json
+import mmap
 import multiprocessing
 import os
 import psutil
+import queue
+import re
+import resource
+import selectors
+import shutil
 import subprocess
 import sys
+import tempfile
 import time
 import threading
+from collections import deque
 from functools import partial
 from pathlib import Path
 
+from admission import POLL_INTERVAL, AdmissionControl
+from limits import find_cgroup_root, run_limited, setup_cgroup_root
+from manifest import load_manifest, select
+from metrics import Metrics, parse_output
+from output_store import OutputStore, store_file
+from proof_store import CVC5
+from result_cache import ResultCache, tool_digest
+
 # Define how to invoke each solver
 SOLVER_COMMANDS = {
     "duper": lambda path: ["/home/user/artifact/duper.sh", path],
@@ -19,83 +36,385 @@ SOLVER_COMMANDS = {
     "verit+smtcoq": lambda path: ["/home/user/artifact/verit+smtcoq.sh", path],
 }
 
+# Persistent checker processes for the warm-worker mode. A server loads its
+# environment once, then reads benchmark paths from stdin (one per line) and ends
+# the output for each of them with a "[done] <exit code>" line.
+SERVER_COMMANDS = {
+    "cvc5+leansmt-compiler": ["/home/user/artifact/cvc5+leansmt-compiler.sh", "--server"],
+    "cvc5+leansmt+compiler": ["/home/user/artifact/cvc5+leansmt+compiler.sh", "--server"],
+}
+
+# Tools each solver calls, hashed into the result cache key
+SOLVER_BINARIES = {
+    "duper": ["/home/user/artifact/duper/.lake/build/bin/duper"],
+    "cvc5+leansmt-compiler": ["/home/user/artifact/lean-cpc-checker/.lake/build/bin/checker"],
+    "cvc5+leansmt+compiler": ["/home/user/artifact/lean-cpc-checker/.lake/build/bin/checker"],
+    "cvc5+ethos": ["/home/user/artifact/cvc5/build/bin/cvc5", "/home/user/artifact/cvc5/deps/bin/ethos",
+                   "/home/user/artifact/cvc5/proofs/eo/cpc/Cpc.eo", "/home/user/artifact/proof_store.py"],
+    "verit+sledgehammer": [],  # Output lives in the Mirabelle directories, never cached
+    "verit+smtcoq": ["/home/user/artifact/veriT9f48a98/veriT", "/home/user/artifact/smtcoq/src/extraction/smtcoq"],
+}
+
+# Per-phase profiler the wrappers call when ARTIFACT_PROFILE is set
+PROFILER = "/home/user/artifact/phase_profile.py"
+
+# Proof store the cvc5 wrappers fetch their proofs from when ARTIFACT_PROOF_STORE is set
+PROOF_STORE = "/home/user/artifact/proof_store.py"
+PROOF_STORE_SOLVERS = ["cvc5+leansmt-compiler", "cvc5+leansmt+compiler", "cvc5+ethos"]
+
+# The Lean-SMT checker; the pinned version has neither --server (--warm) nor --proof (--proof_store)
+CHECKER = "/home/user/artifact/lean-cpc-checker/.lake/build/bin/checker"
+
+DONE_MARKER = re.compile(rb"^\[done\] (-?\d+)\n", re.MULTILINE)
+
 BENCHMARK_ROOT = Path("/home/user/artifact/benchmarks")
 
+def checker_has_option(option):
+    """
+    Whether the checker accepts option, judged by the string literal of the
+    option in its binary. A missing or unreadable binary has no options.
+    """
+    literal = b"\0" + option.encode() + b"\0"
+    try:
+        with open(CHECKER, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return data.find(literal) >= 0
+    except (OSError, ValueError):
+        return False
+
 def kill_process_tree(pid):
     try:
         parent = psutil.Process(pid)
         children = parent.children(recursive=True)
-        for child in children:
-            child.kill()
+        # Parent first, so that it cannot write anything after its children died
         parent.kill()
+        for child in children:
+            try:
+                child.kill()
+            except psutil.NoSuchProcess:
+                pass
     except psutil.NoSuchProcess:
         pass
 
 def monitor_memory(pid, memout_mb, flag):
-    """Monitor memory usage of the process tree."""
+    """Monitor memory usage of the process tree until flag["stop"] is set."""
     try:
         proc = psutil.Process(pid)
-        while not flag["done"]:
+        while not flag["stop"].is_set():
             mem = proc.memory_info().rss  # Memory in bytes
             for child in proc.children(recursive=True):
                 try:
                     mem += child.memory_info().rss
                 except psutil.NoSuchProcess:
                     continue
+            flag["peak"] = max(flag.get("peak", 0), mem)
             if mem > memout_mb * 1024 * 1024:
                 flag["memout"] = True
                 kill_process_tree(pid)
                 return
-            time.sleep(5)
+            # Wakes up at once when the process is done
+            flag["stop"].wait(5)
     except psutil.NoSuchProcess:
         pass
 
-def run_with_limits(cmd, timeout, memout_mb):
+def children_cpu_time():
+    """CPU time used by the reaped children of this process, in seconds."""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def run_with_limits(cmd, timeout, memout_mb, out_fd, err_fd, limits="psutil", cgroup_root=None, env=None):
+    """
+    Run cmd with a timeout and a memory limit, its stdout and stderr going
+    straight to the files out_fd and err_fd. The psutil backend polls the
+    process tree; the cgroup and rlimit backends leave enforcement to the
+    kernel (see limits.py). Return (code, usage), where usage holds the peak
+    memory in MB, the CPU time in seconds and the wall time in seconds until
+    the process was reaped.
+    """
+    if limits != "psutil":
+        return run_limited(cmd, timeout, memout_mb, out_fd, err_fd,
+                           cgroup_root if limits == "cgroup" else None, env)
     try:
+        cpu_start = children_cpu_time()
+        start = time.monotonic()
         proc = subprocess.Popen(
             cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
+            stdout=out_fd,
+            stderr=err_fd,
+            env=env,
             preexec_fn=os.setsid  # new process group
         )
-        flag = {"done": False, "memout": False}
+        flag = {"stop": threading.Event(), "memout": False}
         monitor_thread = threading.Thread(target=monitor_memory, args=(proc.pid, memout_mb, flag))
         monitor_thread.start()
 
+        def usage(end):
+            # Each pool process runs one benchmark at a time
+            return {"peak_rss_mb": flag.get("peak", 0) // (1024 * 1024),
+                    "cpu_time": round(children_cpu_time() - cpu_start, 3),
+                    "wall_time": round(end - start, 3)}
+
         try:
-            stdout, stderr = proc.communicate(timeout=timeout)
-            flag["done"] = True
+            proc.wait(timeout=timeout)
+            end = time.monotonic()
+            flag["stop"].set()
             monitor_thread.join()
             if flag["memout"]:
-                return "MEMOUT", stdout, stderr
-            return proc.returncode, stdout, stderr
+                return "MEMOUT", usage(end)
+            return proc.returncode, usage(end)
         except subprocess.TimeoutExpired:
-            flag["done"] = True
+            flag["stop"].set()
             kill_process_tree(proc.pid)
+            proc.wait()
+            end = time.monotonic()
             monitor_thread.join()
-            return "TIMEOUT", "", ""
+            return "TIMEOUT", usage(end)
     except Exception as e:
-        return "ERROR", "", str(e)
+        write_all(err_fd, str(e).encode())
+        return "ERROR", {}
+
+class WarmWorkerPool:
+    """Idle checker servers, kept alive between benchmarks."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.idle = {}
+
+    def acquire(self, solver):
+        with self.lock:
+            workers = self.idle.setdefault(solver, [])
+            if workers:
+                return workers.pop()
+        return subprocess.Popen(
+            SERVER_COMMANDS[solver],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            preexec_fn=os.setsid  # new process group
+        )
+
+    def release(self, solver, proc):
+        with self.lock:
+            self.idle[solver].append(proc)
+
+    def shutdown(self):
+        with self.lock:
+            workers = [proc for procs in self.idle.values() for proc in procs]
+            self.idle = {}
+        for proc in workers:
+            # Servers exit at the end of their input
+            proc.stdin.close()
+        for proc in workers:
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                kill_process_tree(proc.pid)
 
-def save_output(solver, benchmark_path, stdout, stderr, out_dir):
+# One pool per pool process; servers also exit on their own once the pool
+# process dies and their stdin is closed.
+_warm_pool = None
+
+def get_warm_pool():
+    global _warm_pool
+    if _warm_pool is None:
+        _warm_pool = WarmWorkerPool()
+    return _warm_pool
+
+def read_until_done(proc, timeout):
+    """Read a server's output up to the next done marker.
+
+    Returns (code, stdout, stderr) as bytes, where code is None on timeout and the exit
+    status of the server if it died before finishing the benchmark.
+    """
+    out, err = bytearray(), bytearray()
+    sel = selectors.DefaultSelector()
+    sel.register(proc.stdout, selectors.EVENT_READ, out)
+    sel.register(proc.stderr, selectors.EVENT_READ, err)
+    deadline = time.monotonic() + timeout
     try:
-        # Compute relative benchmark path
-        rel_path = Path(benchmark_path).relative_to(BENCHMARK_ROOT)
-        out_dir = Path(out_dir) / solver / rel_path.parent
-        out_dir.mkdir(parents=True, exist_ok=True)
-
-        # Save stdout and stderr
-        with open(out_dir / (rel_path.name + ".stdout"), 'w') as f_out:
-            f_out.write(stdout)
-        with open(out_dir / (rel_path.name + ".stderr"), 'w') as f_err:
-            f_err.write(stderr)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None, out, err
+            for key, _ in sel.select(remaining):
+                buf = key.data
+                data = os.read(key.fd, 65536)
+                if not data:
+                    if buf is out:
+                        return proc.wait(), out, err
+                    sel.unregister(key.fileobj)
+                    continue
+                start = max(0, len(buf) - 32)
+                buf.extend(data)
+                if buf is out:
+                    match = DONE_MARKER.search(out, start)
+                    if match:
+                        code = int(match.group(1))
+                        del out[match.start():]
+                        # Pick up whatever the server wrote to stderr before the marker
+                        while any(key.data is err for key, _ in sel.select(0)):
+                            data = os.read(proc.stderr.fileno(), 65536)
+                            if not data:
+                                break
+                            err.extend(data)
+                        return code, out, err
+    finally:
+        sel.close()
+
+def run_on_warm_worker(solver, benchmark_path, timeout, memout_mb):
+    pool = get_warm_pool()
+    try:
+        proc = pool.acquire(solver)
+        cpu_start = sum(psutil.Process(proc.pid).cpu_times()[:4])
+        flag = {"stop": threading.Event(), "memout": False}
+        monitor_thread = threading.Thread(target=monitor_memory, args=(proc.pid, memout_mb, flag))
+        monitor_thread.start()
+
+        start = time.monotonic()
+        try:
+            proc.stdin.write(benchmark_path.encode() + b"\n")
+            proc.stdin.flush()
+            code, out, err = read_until_done(proc, timeout)
+        except BrokenPipeError:
+            code, out, err = proc.wait(), bytearray(), bytearray()
+        finally:
+            wall_time = round(time.monotonic() - start, 3)
+            flag["stop"].set()
+        try:
+            cpu_time = sum(psutil.Process(proc.pid).cpu_times()[:4]) - cpu_start
+        except psutil.NoSuchProcess:
+            cpu_time = 0
+        usage = {"peak_rss_mb": flag.get("peak", 0) // (1024 * 1024), "cpu_time": round(cpu_time, 3),
+                 "wall_time": wall_time}
+
+        if code is None:
+            kill_process_tree(proc.pid)
+            monitor_thread.join()
+            return "TIMEOUT", out, err, usage
+        monitor_thread.join()
+        if flag["memout"]:
+            return "MEMOUT", out, err, usage
+        if proc.poll() is None:
+            pool.release(solver, proc)
+        return code, out, err, usage
     except Exception as e:
-        print(f"Failed to save output for {benchmark_path}: {e}", file=sys.stderr)
+        return "ERROR", b"", str(e).encode(), {}
+
+def write_all(fd, data):
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+def open_output(path):
+    # Appending, so that the harness and the solver never overwrite each other
+    return os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC | os.O_APPEND, 0o644)
+
+def cap_output(path, max_bytes):
+    """
+    Cut an output file larger than max_bytes down to at most max_bytes: its
+    first and last lines, each half up to about max_bytes / 2 bytes, with a
+    line that says how much was omitted between them, so that the timing
+    lines at either end survive.
+    """
+    size = os.path.getsize(path)
+    if not max_bytes or size <= max_bytes:
+        return
+    # Room for the marker line, whose count is below size
+    half = max(0, max_bytes - len(f"[... {size} bytes of output omitted ...]\n")) // 2
+    with open(path, 'r+b') as f:
+        start = max(0, half - 65536)
+        f.seek(start)
+        newline = f.read(half - start).rfind(b"\n")
+        head_end = start + newline + 1 if newline >= 0 else half
+        f.seek(size - half)
+        newline = f.read(65536).find(b"\n")
+        tail_start = size - half + newline + 1 if newline >= 0 else size - half
+        marker = f"[... {tail_start - head_end} bytes of output omitted ...]\n".encode()
+        if tail_start - head_end <= len(marker):
+            return  # Cutting would not make the file any smaller
+        f.seek(head_end)
+        f.write(marker)
+        # Move the tail forward block by block; the write position stays behind the read position,
+        # since the marker is shorter than the gap it replaces
+        dst = f.tell()
+        for src in range(tail_start, size, 1 << 20):
+            f.seek(src)
+            block = f.read(1 << 20)
+            f.seek(dst)
+            f.write(block)
+            dst += len(block)
+        f.truncate(dst)
+
+def output_path(solver, benchmark_path, out_dir):
+    rel_path = Path(benchmark_path).relative_to(BENCHMARK_ROOT)
+    return Path(out_dir) / solver / rel_path.parent / (rel_path.name + ".stdout")
+
+def output_files(solver, benchmark_path, out_dir):
+    """Paths of the .stdout and .stderr files of a benchmark, creating their directory."""
+    stdout_path = output_path(solver, benchmark_path, out_dir)
+    stdout_path.parent.mkdir(parents=True, exist_ok=True)
+    return [stdout_path, stdout_path.with_suffix(".stderr")]
 
-def run_single_benchmark(solver_name, timeout, memout_mb, out_dir, benchmark_path):
+def store_name(benchmark_path):
+    """Key of a benchmark in the output store: its path relative to the benchmark root."""
+    return str(Path(benchmark_path).relative_to(BENCHMARK_ROOT))
+
+def finish_output(paths):
+    """Move the .part files written during a run to their final names."""
+    for path in paths:
+        os.replace(f"{path}.part", path)
+
+def load_journal(results_file, solver):
+    """Return the last recorded result of each benchmark for the solver."""
+    recorded = {}
+    try:
+        with open(results_file, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Torn write from an interrupted run
+                if record.get("solver") == solver:
+                    recorded[record["benchmark"]] = record["result"]
+    except FileNotFoundError:
+        pass
+    return recorded
+
+def pending_benchmarks(benchmark_paths, solver, out_dir, results_file, rerun_failed, store=None):
+    """
+    Drop the benchmarks that already have a result in the journal. Runs
+    without a journal fall back to the saved .stdout files (or the output
+    store), which are only written once a benchmark is done. With
+    rerun_failed, TIMEOUT and ERROR results are run again.
+    """
+    recorded = load_journal(results_file, solver)
+    if not recorded and store is not None:
+        return [path for path in benchmark_paths if store_name(path) not in store]
+    if not recorded:
+        return [path for path in benchmark_paths if not output_path(solver, path, out_dir).exists()]
+    pending = []
+    for path in benchmark_paths:
+        result = recorded.get(path)
+        if result is None or (rerun_failed and result in ("TIMEOUT", "ERROR")):
+            pending.append(path)
+    return pending
+
+def run_with_proof_dir(cmd, timeout, memout_mb, out_fd, err_fd, limits, cgroup_root, proof_dir, env=None):
+    """
+    Run cmd with a private directory for its proof files (ARTIFACT_PROOF_DIR)
+    below proof_dir, which is removed however the run ends, and the
+    variables in env.
+    """
+    scratch = tempfile.mkdtemp(prefix="proofs-", dir=proof_dir)
+    try:
+        env = dict(os.environ, **(env or {}), ARTIFACT_PROOF_DIR=scratch)
+        return run_with_limits(cmd, timeout, memout_mb, out_fd, err_fd, limits, cgroup_root, env)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+def run_single_benchmark(solver_name, timeout, memout_mb, out_dir, warm, limits, cgroup_root, cache, proof_dir,
+                         max_output, benchmark_path, repeat=1, warmup=0, store=None):
     if solver_name not in SOLVER_COMMANDS:
-        return (benchmark_path, "INVALID_SOLVER", f"Solver {solver_name} is not recognized.")
+        return (benchmark_path, "INVALID_SOLVER", {})
 
     # Only pass the out_dir argument to verit+sledgehammer
     if solver_name == "verit+sledgehammer":
@@ -103,9 +422,283 @@ def run_single_benchmark(solver_name, timeout, memout_mb, out_dir, benchmark_pat
     else:
         cmd = SOLVER_COMMANDS[solver_name](benchmark_path)
 
-    code, out, err = run_with_limits(cmd, timeout, memout_mb)
-    save_output(solver_name, benchmark_path, out, err, out_dir)
-    return (benchmark_path, code)
+    # Output goes to .part files until the run is over, so that --resume
+    # never takes an interrupted run for a finished one. With an output
+    # store, the files of the runs are packed into it at the end.
+    try:
+        name = store_name(benchmark_path) if store is not None else None
+        paths = store.scratch_files() if store is not None else output_files(solver_name, benchmark_path, out_dir)
+    except Exception as e:
+        print(f"Failed to save output for {benchmark_path}: {e}", file=sys.stderr)
+        return (benchmark_path, "ERROR", {})
+    stdout_path, stderr_path = (f"{path}.part" for path in paths)
+
+    if cache is not None:
+        key = cache.key(benchmark_path, timeout, memout_mb)
+        hit = cache.get(key, stdout_path, stderr_path)
+        if hit is not None:
+            code, usage = hit
+            if store is not None:
+                store.put(name, [(stdout_path, stderr_path)])
+            else:
+                finish_output(paths)
+            return (benchmark_path, code, dict(usage, cached=True))
+
+    def run_once(stdout_path, stderr_path):
+        start = time.monotonic()
+        out_fd, err_fd = open_output(stdout_path), open_output(stderr_path)
+        try:
+            if warm:
+                code, out, err, usage = run_on_warm_worker(solver_name, benchmark_path, timeout, memout_mb)
+                write_all(out_fd, out)
+                write_all(err_fd, err)
+            else:
+                code, usage = run_with_proof_dir(cmd, timeout, memout_mb, out_fd, err_fd, limits, cgroup_root,
+                                                 proof_dir)
+            # Measured when the solver was reaped, else here
+            usage.setdefault("wall_time", round(time.monotonic() - start, 3))
+            # When the run ended, for results at shorter virtual timeouts (see results_index.py)
+            write_all(out_fd, f"[time] exit: {int(usage['wall_time'] * 1000)}\n".encode())
+        finally:
+            os.close(out_fd)
+            os.close(err_fd)
+        cap_output(stdout_path, max_output)
+        cap_output(stderr_path, max_output)
+        return code, usage
+
+    # Measurement mode: discard the warmup runs, keep the first measured run
+    # as the result and the others next to it as .rep<k> files, which
+    # collect_stats.py reduces to the median and quartiles of each phase
+    for _ in range(warmup):
+        run_once(os.devnull, os.devnull)
+    code, usage = run_once(stdout_path, stderr_path)
+    for k in range(2, repeat + 1):
+        run_once(f"{paths[0]}.rep{k}", f"{paths[1]}.rep{k}")
+    k = max(repeat, 1) + 1
+    while os.path.exists(f"{paths[0]}.rep{k}"):  # Left by an earlier run with more repetitions
+        os.unlink(f"{paths[0]}.rep{k}")
+        if os.path.exists(f"{paths[1]}.rep{k}"):
+            os.unlink(f"{paths[1]}.rep{k}")
+        k += 1
+    if repeat > 1:
+        usage["repeats"] = repeat
+
+    if cache is not None:
+        cache.put(key, code, stdout_path, stderr_path, usage)
+    if store is not None:
+        store.put(name, [(stdout_path, stderr_path)] +
+                  [(f"{paths[0]}.rep{k}", f"{paths[1]}.rep{k}") for k in range(2, repeat + 1)])
+    else:
+        finish_output(paths)
+    return (benchmark_path, code, usage)
+
+def run_sledgehammer_batch(timeout, memout_mb, out_dir, limits, cgroup_root, proof_dir, max_output, paths):
+    """
+    Check the goals of several benchmarks of one Seventeen theory in a single
+    Mirabelle session, which gets the timeout of all of them together. The
+    output of the session is saved for each benchmark, and
+    verit+sledgehammer.sh splits mirabelle.log into a log per benchmark.
+    """
+    if len(paths) == 1:
+        return [run_single_benchmark("verit+sledgehammer", timeout, memout_mb, out_dir, False, limits, cgroup_root,
+                                     None, proof_dir, max_output, paths[0])]
+
+    try:
+        outputs = [output_files("verit+sledgehammer", path, out_dir) for path in paths]
+    except Exception as e:
+        print(f"Failed to save output for {paths[0]}: {e}", file=sys.stderr)
+        return [(path, "ERROR", {}) for path in paths]
+    stdout_path, stderr_path = (f"{path}.part" for path in outputs[0])
+
+    cmd = ["/home/user/artifact/verit+sledgehammer.sh", out_dir] + list(paths)
+    start = time.monotonic()
+    out_fd, err_fd = open_output(stdout_path), open_output(stderr_path)
+    try:
+        # Each goal keeps its own timeout within the session (see verit+sledgehammer.sh)
+        code, usage = run_with_proof_dir(cmd, timeout * len(paths), memout_mb, out_fd, err_fd, limits, cgroup_root,
+                                         proof_dir, {"ARTIFACT_GOAL_TIMEOUT": str(int(timeout))})
+    finally:
+        os.close(out_fd)
+        os.close(err_fd)
+    usage.setdefault("wall_time", round(time.monotonic() - start, 3))
+    usage["batch"] = len(paths)
+    cap_output(stdout_path, max_output)
+    cap_output(stderr_path, max_output)
+    for other in outputs[1:]:
+        for src, dst in zip(outputs[0], other):
+            shutil.copyfile(f"{src}.part", f"{dst}.part")
+    for files in outputs:
+        finish_output(files)
+    return [(path, code, usage) for path in paths]
+
+def run_each(run_func, paths):
+    return [run_func(path) for path in paths]
+
+def batch_benchmarks(paths, size):
+    """
+    Group benchmarks by directory (for Seventeen, by module and theory) in
+    order of first appearance, at most size per group (0: no limit).
+    """
+    groups = {}
+    for path in paths:
+        groups.setdefault(os.path.dirname(path), []).append(path)
+    batches = []
+    for group in groups.values():
+        step = size or len(group)
+        batches.extend(tuple(group[i:i + step]) for i in range(0, len(group), step))
+    return batches
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}"
+
+def report_progress(done, total, start_time):
+    elapsed = time.monotonic() - start_time
+    rate = done / elapsed if elapsed > 0 else 0
+    eta = (total - done) / rate if rate > 0 else 0
+    print(f"[progress] {done}/{total} done, {rate * 60:.1f} benchmarks/min, "
+          f"elapsed {format_duration(elapsed)}, ETA {format_duration(eta)}", file=sys.stderr, flush=True)
+
+def terminate_last_line(file_path):
+    """Finish a line left incomplete by an interrupted run before appending."""
+    try:
+        with open(file_path, 'rb+') as f:
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+    except FileNotFoundError:
+        pass
+
+def run_streaming(pool, runs, queues, jobs, admission=None, metrics=None):
+    """
+    Hand the (solver, benchmarks) tasks in queues to the pool in priority
+    order, keeping at most jobs tasks running in total and at most the jobs
+    of its run per solver. A task is a tuple of benchmarks, of which all but
+    verit+sledgehammer batches have one. Append a JSON record for each
+    benchmark to the results file of its solver as soon as its task
+    finishes. Return the results of each solver in completion order.
+
+    With admission control (see admission.py), a task only starts when
+    there is memory for it, and the tasks it preempts are queued again.
+    With metrics (see metrics.py), every finished benchmark is counted, with
+    the result and phase times of its output.
+    """
+    finished = queue.Queue()
+    running = {solver: 0 for solver in runs}
+    in_flight = {}
+    preempted = set()
+    results = {solver: [] for solver in runs}
+    total = sum(len(paths) for tasks in queues.values() for _, paths in tasks)
+    start_time = time.monotonic()
+    files = {}
+    if metrics is not None:
+        metrics.begin({solver: sum(len(paths) for _, paths in tasks) for solver, tasks in queues.items()})
+    try:
+        for run in runs.values():
+            results_file = run["results_file"]
+            if results_file not in files:
+                os.makedirs(os.path.dirname(os.path.abspath(results_file)), exist_ok=True)
+                terminate_last_line(results_file)
+                files[results_file] = open(results_file, 'a', buffering=1)
+
+        done = 0
+        while done < total:
+            while sum(running.values()) < jobs:
+                ready = [solver for solver, tasks in queues.items() if tasks and running[solver] < runs[solver]["jobs"]]
+                if not ready:
+                    break
+                solver = min(ready, key=lambda solver: queues[solver][0][0])
+                if admission is not None and not admission.admit(solver, list(in_flight)):
+                    break
+                priority, paths = queues[solver].popleft()
+                running[solver] += 1
+                if metrics is not None:
+                    metrics.started(solver)
+                in_flight[(solver, paths)] = priority, pool.apply_async(runs[solver]["run"], (paths,),
+                                 callback=lambda task_results, solver=solver, paths=paths:
+                                     finished.put((solver, paths, task_results)),
+                                 error_callback=lambda e, solver=solver, paths=paths:
+                                     finished.put((solver, paths, [(path, "ERROR", {}) for path in paths])))
+
+            try:
+                solver, paths, task_results = finished.get(
+                    timeout=POLL_INTERVAL if admission is not None or metrics is not None else None)
+            except queue.Empty:
+                if admission is not None:
+                    victim = admission.relieve({task: result for task, (_, result) in in_flight.items()})
+                    if victim is not None:
+                        preempted.add(victim)
+                if metrics is not None:
+                    metrics.write()
+                continue
+            running[solver] -= 1
+            if metrics is not None:
+                metrics.stopped(solver)
+            priority, _ = in_flight.pop((solver, paths))
+            if len(paths) == 1 and (solver, paths[0]) in preempted:
+                # Killed to free memory: drop its result and run it again
+                preempted.discard((solver, paths[0]))
+                if runs[solver]["cache"] is not None:
+                    runs[solver]["cache"].discard(runs[solver]["cache"].key(paths[0], runs[solver]["timeout"],
+                                                                             runs[solver]["memout"]))
+                queues[solver].appendleft((priority, paths))
+                continue
+            for path, code, usage in task_results:
+                if admission is not None:
+                    admission.observe(solver, usage)
+                record = {"solver": solver, "benchmark": path, "result": code, **usage, "finished": time.time()}
+                files[runs[solver]["results_file"]].write(json.dumps(record) + "\n")
+                results[solver].append((path, code, usage))
+                if metrics is not None:
+                    metrics.record(solver, code, parse_finished(solver, path, runs[solver]))
+                done += 1
+            report_progress(done, total, start_time)
+            if metrics is not None:
+                metrics.write()
+    finally:
+        for f_res in files.values():
+            f_res.close()
+        if metrics is not None:
+            metrics.write(force=True)
+    return results
+
+def parse_finished(solver, path, run):
+    """Parse the output of a finished benchmark, from the output store of its run or the tree."""
+    if run["store"] is not None:
+        stored = run["store"].get(store_name(path))
+        return parse_output(solver, path, stored[0][0]) if stored else {}
+    return parse_output(solver, str(output_path(solver, path, run["output_dir"])))
+
+def task_command(solver, out_dir, paths):
+    """The command of a task of the solver on its benchmarks, as run_single_benchmark and run_sledgehammer_batch run it."""
+    if solver == "verit+sledgehammer":
+        return ["/home/user/artifact/verit+sledgehammer.sh", out_dir] + list(paths)
+    return SOLVER_COMMANDS[solver](paths[0])
+
+def physical_cores():
+    """One logical CPU of each physical core this process may run on, then the other logical CPUs."""
+    allowed = sorted(os.sched_getaffinity(0))
+    first = []
+    rest = []
+    seen = set()
+    for cpu in allowed:
+        try:
+            with open(f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list", 'r') as f:
+                siblings = f.read().strip()
+        except OSError:
+            siblings = str(cpu)
+        (rest if siblings in seen else first).append(cpu)
+        seen.add(siblings)
+    return first + rest
+
+def pin_worker(cores, counter):
+    """Pool initializer: pin this worker, and the solvers it starts, to the next core of cores."""
+    with counter.get_lock():
+        core = cores[counter.value % len(cores)]
+        counter.value += 1
+    os.sched_setaffinity(0, {core})
 
 def read_benchmarks(file_path):
     try:
@@ -115,26 +708,262 @@ def read_benchmarks(file_path):
         print(f"Error: File '{file_path}' not found.")
         sys.exit(1)
 
+def resolve_limits(limits, cgroup_root=None):
+    """Pick the backend for --limits auto and set up the cgroup root. Return (limits, cgroup_root)."""
+    if limits not in ("auto", "cgroup"):
+        return limits, None
+    cgroup_root = setup_cgroup_root(cgroup_root or find_cgroup_root())
+    if cgroup_root is None:
+        if limits == "cgroup":
+            print("Warning: no usable cgroup v2 memory controller, falling back to psutil", file=sys.stderr)
+        return "psutil", None
+    return "cgroup", cgroup_root
+
+def parse_solver_limits(spec):
+    """Parse SOLVER:TIMEOUT:MEMOUT[:JOBS]; empty fields keep the global setting."""
+    solver, *fields = spec.split(":")
+    if solver not in SOLVER_COMMANDS or not 1 <= len(fields) <= 3:
+        raise argparse.ArgumentTypeError(f"expected SOLVER:TIMEOUT:MEMOUT[:JOBS], got {spec}")
+    try:
+        return solver, {name: int(value) for name, value in zip(("timeout", "memout", "jobs"), fields) if value}
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected SOLVER:TIMEOUT:MEMOUT[:JOBS], got {spec}")
+
+def prepare_run(args, solver, limits, benchmark_paths, cgroup_root):
+    """Set up the run of one solver: its run function, results file, cache and pending benchmarks."""
+    results_file = args.results_file or os.path.join(args.output_dir, f"{solver}.jsonl")
+    store = None
+    if args.output_store and solver != "verit+sledgehammer":
+        os.makedirs(args.output_dir, exist_ok=True)
+        store = OutputStore(store_file(args.output_dir, solver))
+    if args.resume:
+        pending = pending_benchmarks(benchmark_paths, solver, args.output_dir, results_file, args.rerun_failed,
+                                     store)
+        print(f"Resuming {solver}: {len(benchmark_paths) - len(pending)} of {len(benchmark_paths)} benchmarks "
+              f"already done", file=sys.stderr)
+    else:
+        pending = benchmark_paths
+
+    tools = SOLVER_BINARIES[solver] + ([PROFILER] if args.profile else [])
+    if args.proof_store and solver in PROOF_STORE_SOLVERS:
+        tools += [PROOF_STORE, CVC5]
+    cache = None
+    if args.cache_dir and solver != "verit+sledgehammer":
+        wrapper = SOLVER_COMMANDS[solver]("")[0]
+        cache = ResultCache(args.cache_dir, tool_digest(solver, [wrapper] + tools))
+
+    if solver == "verit+sledgehammer":
+        run_func = partial(run_sledgehammer_batch, limits["timeout"], limits["memout"], args.output_dir, args.limits,
+                           cgroup_root, args.proof_dir, args.max_output * 1024 * 1024)
+        batches = batch_benchmarks(pending, args.sledgehammer_batch)
+    else:
+        run_func = partial(run_each, partial(run_single_benchmark, solver, limits["timeout"], limits["memout"],
+                                             args.output_dir, args.warm and solver in SERVER_COMMANDS, args.limits,
+                                             cgroup_root, cache, args.proof_dir, args.max_output * 1024 * 1024,
+                                             repeat=args.repeat, warmup=args.warmup, store=store))
+        batches = [(path,) for path in pending]
+    return {"run": run_func, "results_file": results_file, "cache": cache, "store": store,
+            "output_dir": args.output_dir, "pending": pending, "batches": batches, **limits}
+
 def main():
-    parser = argparse.ArgumentParser(description="Run solver on a set of benchmarks with parallelism and resource limits.")
+    parser = argparse.ArgumentParser(description="Run solvers on a set of benchmarks with parallelism and resource limits.")
     parser.add_argument("input_file", help="Path to file containing full benchmark paths")
-    parser.add_argument("solver", choices=SOLVER_COMMANDS.keys(), help="Solver to use")
+    parser.add_argument("solvers", nargs="+", choices=SOLVER_COMMANDS.keys(), metavar="solver",
+                        help="Solvers to use; all of them run over the benchmarks in one shared pool")
     parser.add_argument("--jobs", "-j", type=int, default=1, help="Number of benchmarks to run in parallel")
     parser.add_argument("--timeout", "-t", type=int, default=60, help="Timeout (in seconds) per benchmark")
     parser.add_argument("--memout", "-m", type=int, default=1024, help="Memory limit (in MB) per benchmark")
+    parser.add_argument("--solver_limits", type=parse_solver_limits, action="append", default=[],
+                        metavar="SOLVER:TIMEOUT:MEMOUT[:JOBS]",
+                        help="Timeout, memory limit and maximum number of parallel benchmarks of one solver "
+                             "(e.g. verit+sledgehammer:1200:16384:1); can be repeated")
     parser.add_argument("--output_dir", "-o", type=str, default="/home/user/artifact/output",
                         help="Root directory for solver output")
+    parser.add_argument("--warm", action="store_true",
+                        help="Keep pre-loaded checker servers alive between benchmarks (Lean-SMT only). No effect "
+                             "with the shipped checker, which has no --server: each benchmark then runs on its own")
+    parser.add_argument("--limits", choices=["auto", "cgroup", "rlimit", "psutil"], default="auto",
+                        help="How to enforce the limits: cgroup v2, setrlimit, or polling with psutil "
+                             "(auto: cgroup if available, else psutil; the peak memory of cgroup includes page cache)")
+    parser.add_argument("--cgroup_root", type=str, default=None,
+                        help="Delegated cgroup v2 directory for the cgroup backend (default: own cgroup)")
+    parser.add_argument("--results_file", type=str, default=None,
+                        help="JSON Lines file the results are appended to as they finish "
+                             "(default: <output_dir>/<solver>.jsonl)")
+    parser.add_argument("--cache_dir", type=str, default=None,
+                        help="Reuse results of unchanged benchmark/tool/limit combinations stored in this directory")
+    parser.add_argument("--cache_size", type=int, default=10240,
+                        help="Size limit of the result cache (in MB); least recently used entries are evicted")
+    parser.add_argument("--proof_dir", type=str, default=None,
+                        help="Directory for the proof files passed from solver to checker, e.g. the tmpfs "
+                             "/dev/shm (default: the system temporary directory)")
+    parser.add_argument("--proof_store", type=str, default=None,
+                        help="Run cvc5 once per benchmark and let all cvc5 configurations check the proof it "
+                             "stores in this directory (see proof_store.py). No effect for the Lean-SMT "
+                             "configurations with the shipped checker, which has no --proof: they solve in place")
+    parser.add_argument("--output_store", action="store_true",
+                        help="Pack the output of each solver into <output_dir>/<solver>.outputs.db instead of a "
+                             ".stdout and .stderr file per benchmark (see output_store.py; not for verit+sledgehammer)")
+    parser.add_argument("--max_output", type=int, default=64,
+                        help="Size limit (in MB) of each saved stdout/stderr; larger output keeps only its "
+                             "beginning and end (0: no limit)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Log the wall time, CPU time and peak RSS of each phase and the size of the proof "
+                             "(see phase_profile.py)")
+    parser.add_argument("--order", choices=["input", "longest"], default="input",
+                        help="Run the benchmarks in input order, or longest expected first (see schedule.py)")
+    parser.add_argument("--history_dir", type=str, default=None,
+                        help="Data directory with earlier runs to predict benchmark costs from for --order longest "
+                             "(default: schedule.HISTORY_DIR, i.e. data/all)")
+    parser.add_argument("--sledgehammer_batch", type=int, default=0,
+                        help="Largest number of benchmarks of one Seventeen theory that verit+sledgehammer checks "
+                             "in a single Mirabelle session (0: all of them, 1: a session per benchmark)")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Run each benchmark this many times; collect_stats.py reports the median and quartiles "
+                             "of each phase")
+    parser.add_argument("--warmup", type=int, default=0,
+                        help="Runs of each benchmark before the measured ones, whose results are discarded")
+    parser.add_argument("--mem_reserve", type=int, default=None,
+                        help="Memory (in MB) to keep available: start benchmarks only when there is room for "
+                             "them, and preempt and requeue the latest one under pressure (see admission.py)")
+    parser.add_argument("--metrics_port", type=int, default=None,
+                        help="Serve live metrics of the run in the Prometheus format on this port (see metrics.py)")
+    parser.add_argument("--metrics_host", type=str, default="127.0.0.1",
+                        help="Address to serve the metrics on (default: 127.0.0.1; 0.0.0.0 for all interfaces)")
+    parser.add_argument("--metrics_file", type=str, default=None,
+                        help="Rewrite live metrics of the run in the Prometheus format to this file every few "
+                             "seconds, e.g. for the textfile collector of node_exporter")
+    parser.add_argument("--pin", action="store_true",
+                        help="Pin each job to its own core (distinct physical cores first), so that parallel "
+                             "benchmarks do not share a core")
+    parser.add_argument("--manifest", type=str, default=None,
+                        help="Manifest of the benchmark files (see manifest.py) to select benchmarks by, "
+                             "before any solver starts")
+    parser.add_argument("--skip_status", nargs="+", default=[], metavar="STATUS",
+                        help="With --manifest, skip benchmarks with this (set-info :status ...), e.g. sat")
+    parser.add_argument("--logics", nargs="+", default=None, metavar="LOGIC",
+                        help="With --manifest, only run benchmarks of these logics")
+    parser.add_argument("--max_size", type=float, default=None,
+                        help="With --manifest, skip benchmarks larger than this (in MB)")
+    parser.add_argument("--dedup", action="store_true",
+                        help="With --manifest, skip benchmarks with the same content as one earlier in the list")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip benchmarks that already have a result in the results file or the output directory")
+    parser.add_argument("--rerun_failed", action="store_true",
+                        help="With --resume, run benchmarks recorded as TIMEOUT or ERROR again")
 
     args = parser.parse_args()
+    solvers = list(dict.fromkeys(args.solvers))
+    if args.warm and not any(solver in SERVER_COMMANDS for solver in solvers):
+        parser.error(f"--warm is not supported for solvers {', '.join(solvers)}")
+    if args.proof_dir and not os.path.isdir(args.proof_dir):
+        parser.error(f"--proof_dir {args.proof_dir} is not a directory")
+    if not args.manifest and (args.skip_status or args.logics or args.max_size is not None or args.dedup):
+        parser.error("--skip_status, --logics, --max_size and --dedup need a --manifest")
+    if args.warm and not checker_has_option("--server"):
+        # Without it, every server would exit at once and fail all its benchmarks
+        print(f"warning: --warm has no effect, as {CHECKER} has no --server option; "
+              f"running each benchmark in its own checker process instead", file=sys.stderr)
+        args.warm = False
+    if args.proof_store and args.warm:
+        parser.error("--proof_store is not supported by the checker servers of --warm")
+    if (args.repeat > 1 or args.warmup) and args.cache_dir:
+        parser.error("--repeat and --warmup measure fresh runs and cannot be combined with --cache_dir")
+    if (args.repeat > 1 or args.warmup) and "verit+sledgehammer" in solvers:
+        parser.error("--repeat and --warmup are not supported for verit+sledgehammer")
+    if args.pin and args.jobs > len(os.sched_getaffinity(0)):
+        parser.error(f"--pin needs a core per job, but only {len(os.sched_getaffinity(0))} are available")
+    solver_limits = dict(args.solver_limits)
+
+    args.limits, cgroup_root = resolve_limits(args.limits, args.cgroup_root)
+    if args.profile:
+        # Inherited by the wrapper scripts
+        os.environ["ARTIFACT_PROFILE"] = "1"
+    if args.proof_store:
+        os.makedirs(args.proof_store, exist_ok=True)
+        os.environ["ARTIFACT_PROOF_STORE"] = os.path.abspath(args.proof_store)
+        # The Lean-SMT wrappers only check the stored proof if the checker can load it
+        if checker_has_option("--proof"):
+            os.environ["ARTIFACT_CHECKER_PROOF"] = "1"
+        elif any(solver in SERVER_COMMANDS for solver in solvers):
+            lean = [solver for solver in solvers if solver in SERVER_COMMANDS]
+            print(f"warning: --proof_store has no effect for {', '.join(lean)}, as {CHECKER} has no --proof "
+                  f"option to load a recorded proof; they solve in place", file=sys.stderr)
+
     benchmark_paths = read_benchmarks(args.input_file)
+    if args.manifest:
+        total = len(benchmark_paths)
+        max_size = int(args.max_size * 1024 * 1024) if args.max_size is not None else None
+        benchmark_paths, dropped = select(benchmark_paths, load_manifest(args.manifest), BENCHMARK_ROOT,
+                                          args.skip_status, args.logics, max_size, args.dedup)
+        print(f"[manifest] {len(benchmark_paths)} of {total} benchmarks selected"
+              + "".join(f", {count} {reason}" for reason, count in sorted(dropped.items())), file=sys.stderr)
+    index = {path: i for i, path in enumerate(benchmark_paths)}
+    runs = {}
+    for solver in solvers:
+        limits = {"timeout": args.timeout, "memout": args.memout, "jobs": args.jobs, **solver_limits.get(solver, {})}
+        runs[solver] = prepare_run(args, solver, limits, benchmark_paths, cgroup_root)
+
+    # Each solver's tasks are queued by priority: benchmark-major in input
+    # order, or longest expected first
+    queues = {}
+    costs = {}
+    if args.order == "longest":
+        # Only here, as schedule.py reads the history with pandas and pyarrow
+        from schedule import HISTORY_DIR, makespan, predict_costs
+        history_dir = args.history_dir or HISTORY_DIR
+    for j, (solver, run) in enumerate(runs.items()):
+        if args.order == "longest":
+            path_costs = predict_costs(run["pending"], solver, BENCHMARK_ROOT, run["timeout"], history_dir)
+            costs[solver] = {paths: sum(path_costs[path] for path in paths) for paths in run["batches"]}
+            tasks = [((-costs[solver][paths], index[paths[0]], j), paths) for paths in run["batches"]]
+        else:
+            tasks = [((index[paths[0]], j), paths) for paths in run["batches"]]
+        queues[solver] = deque(sorted(tasks))
+
+    if args.order == "longest":
+        tasks = [(priority, costs[solver][paths]) for solver, pending in queues.items() for priority, paths in pending]
+        predicted = makespan([cost for _, cost in sorted(tasks)], args.jobs) / 1000
+        unordered = makespan([cost for _, cost in sorted(tasks, key=lambda task: task[0][1:])], args.jobs) / 1000
+        print(f"[schedule] predicted makespan {format_duration(predicted)} longest first, "
+              f"{format_duration(unordered)} in input order", file=sys.stderr)
+
+    start_time = time.monotonic()
+    initializer = None
+    initargs = ()
+    if args.pin:
+        initializer, initargs = pin_worker, (physical_cores(), multiprocessing.Value('i', 0))
+    admission = None
+    if args.mem_reserve is not None:
+        admission = AdmissionControl(args.mem_reserve,
+                                     {solver: partial(task_command, solver, args.output_dir) for solver in solvers})
+    metrics = None
+    if args.metrics_port is not None or args.metrics_file:
+        metrics = Metrics(args.jobs, args.metrics_file)
+        if args.metrics_port is not None:
+            metrics.serve(args.metrics_host, args.metrics_port)
+    with multiprocessing.Pool(args.jobs, initializer, initargs) as pool:
+        results = run_streaming(pool, runs, queues, args.jobs, admission, metrics)
+    if args.order == "longest":
+        print(f"[schedule] actual makespan {format_duration(time.monotonic() - start_time)}", file=sys.stderr)
+
+    for solver, run in runs.items():
+        if run["cache"] is not None:
+            hits = sum(1 for _, _, usage in results[solver] if usage.get("cached"))
+            evicted = run["cache"].evict(args.cache_size)
+            print(f"Result cache ({solver}): {hits} hits, {len(results[solver]) - hits} misses, "
+                  f"{evicted} entries evicted", file=sys.stderr)
 
-    with multiprocessing.Pool(args.jobs) as pool:
-        run_func = partial(run_single_benchmark, args.solver, args.timeout, args.memout, args.output_dir)
-        results = pool.map(run_func, benchmark_paths)
+    for solver in solvers:
+        # Report in input order
+        results[solver].sort(key=lambda result: index[result[0]])
 
-    print(f"\nSummary for solver: {args.solver}")
-    for path, code in results:
-        print(f"{path} -> {code}")
+        print(f"\nSummary for solver: {solver}")
+        for path, code, usage in results[solver]:
+            if "cpu_time" in usage:
+                print(f"{path} -> {code} (cpu {usage['cpu_time']} s, peak {usage['peak_rss_mb']} MB)")
+            else:
+                print(f"{path} -> {code}")
 
 if __name__ == "__main__":
     main()
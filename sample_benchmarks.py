@@ -0,0 +1,181 @@
+"""Stratified, seeded benchmark subsets and full-suite estimates from them.
+
+The first N lines of a benchmark list only cover its first few logic
+directories. This script instead samples the list by difficulty, SMT-LIB logic
+and family (both from the non-incremental/<LOGIC>/<family> layout; for
+Seventeen, the module). The difficulty of a benchmark is the shortest time any
+solver took on it in earlier runs (data/all by default): easy below 1 s,
+medium below 60 s, hard otherwise, unknown without history. Each difficulty
+class gets its proportional share of the sample (at least one benchmark). In
+a class, the benchmarks are ordered by logic and family and every step-th one
+is taken from a random start, which spreads the sample over the logics and
+families in proportion to their size while giving every benchmark of the
+class the same chance. The random start and the order within families come
+from a seeded generator, so a list, size and seed always give the same subset.
+
+Next to the subset, a weights CSV records the stratum of each sampled
+benchmark and how many benchmarks of the list it stands for. From the data of
+a run on the subset, the estimate command then extrapolates the solved and
+checked counts and the total time of each solver to the whole list, with 95%
+confidence intervals (stratified estimator over the difficulty classes).
+
+Usage:
+  python3 sample_benchmarks.py sample <input list> <output list> --count N [--seed S]
+  python3 sample_benchmarks.py estimate <sampled list> <data directory> [--output table.tex]
+"""
+
+import argparse
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from results_index import RunIndex
+from results_store import load_runs, solver_name
+from run_benchmarks import BENCHMARK_ROOT, read_benchmarks
+from schedule import HISTORY_DIR, benchmark_key, load_history, path_groups
+from tables import save_table_to_latex
+
+# Upper bounds (in milliseconds) of the easy and medium difficulty classes
+DIFFICULTY_BOUNDS = [1000, 60000]
+DIFFICULTY_NAMES = ["easy", "medium", "hard"]
+
+# Normal quantile of the 95% confidence intervals
+Z = 1.96
+
+METRICS = ["Solved", "Checked", "Checked (no holes)", "Time (s)"]
+
+def weights_file(list_file):
+    return os.path.splitext(list_file)[0] + ".weights.csv"
+
+def load_difficulty(history_dir, timeout):
+    """Map the key of every benchmark with history to its difficulty class."""
+    best = {}
+    for solver in sorted({solver_name(csv_file) for csv_file in glob.glob(os.path.join(history_dir, "*", "*.csv"))}):
+        for key, cost in load_history(history_dir, solver, timeout * 1000).items():
+            best[key] = min(cost, best.get(key, cost))
+    classes = np.searchsorted(DIFFICULTY_BOUNDS, list(best.values()), side="right")
+    return {key: DIFFICULTY_NAMES[c] for key, c in zip(best, classes)}
+
+def strata(paths, difficulty):
+    """One row per benchmark path with its key, logic, family and difficulty."""
+    keys = [benchmark_key(path, BENCHMARK_ROOT) for path in paths]
+    logic, family = zip(*(path_groups(key) for key in keys)) if keys else ((), ())
+    return pd.DataFrame({
+        "path": paths,
+        "benchmark": keys,
+        "logic": logic,
+        "family": family,
+        "difficulty": [difficulty.get(key, "unknown") for key in keys],
+    })
+
+def allocate(sizes, count, rng):
+    """Split count over classes of the given sizes in proportion, largest remainders first."""
+    quotas = sizes * count / sizes.sum()
+    counts = np.floor(quotas).astype(int)
+    order = np.lexsort((rng.random(len(sizes)), counts - quotas))
+    counts[order[:count - counts.sum()]] += 1
+    return counts
+
+def sample(paths, count, seed, difficulty):
+    """Draw a sample of count paths. Return its rows, in list order, with their weights."""
+    population = strata(paths, difficulty)
+    if count >= len(population):
+        return population.assign(weight=1.0)
+    rng = np.random.default_rng(seed)
+    population["order"] = rng.random(len(population))
+    classes = population.groupby("difficulty").indices
+    names = sorted(classes)
+    counts = allocate(np.array([len(classes[name]) for name in names]), count, rng)
+    if count >= len(names):
+        for i in np.flatnonzero(counts == 0):
+            counts[np.argmax(counts)] -= 1
+            counts[i] = 1
+
+    chosen = []
+    weights = []
+    for name, n in zip(names, counts):
+        members = population.iloc[classes[name]].sort_values(["logic", "family", "order"])
+        step = len(members) / n if n else 0
+        chosen.extend(members.index[(rng.random() * step + np.arange(n) * step).astype(int)])
+        weights.extend([step] * n)
+    picked = population.loc[chosen].drop(columns="order").assign(weight=weights)
+    return picked.sort_index()
+
+def estimate(weights, runs, suite):
+    """
+    Estimate the solved and checked counts and the total time of each run on
+    the whole list, with the half-width of their 95% confidence interval.
+    """
+    table_data = []
+    for name in sorted(runs):
+        df, kind = runs[name]
+        index = RunIndex(df, kind)
+        values = pd.DataFrame({
+            "Solved": index.solved,
+            "Checked": index.checked,
+            "Checked (no holes)": index.checked_no_holes,
+            "Time (s)": index.done_at / 1000,
+        }, index=(suite + "/" + df['benchmark'].astype(str)).to_numpy())
+        values = values[~values.index.duplicated(keep="last")]
+        sampled = weights.join(values.astype(float), on="benchmark")
+        missing = int(sampled["Solved"].isna().sum())
+        if missing:
+            print(f"Warning: {missing} sampled benchmarks have no result for {name}, counted as unsolved",
+                  file=sys.stderr)
+
+        row = {"Solver+Checker": name}
+        for metric in METRICS:
+            y = sampled[metric].fillna(0) * sampled["weight"]
+            group = y.groupby(sampled["difficulty"])
+            n = group.transform("size")
+            fpc = 1 - n / sampled["weight"].groupby(sampled["difficulty"]).transform("sum")
+            spread = ((y - group.transform("mean")) ** 2 * fpc * n / (n - 1)).where(n > 1, 0)
+            row[metric] = f"{y.sum():.0f} $\\pm$ {Z * np.sqrt(spread.sum()):.0f}"
+        table_data.append(row)
+    return pd.DataFrame(table_data)
+
+def main():
+    parser = argparse.ArgumentParser(description="Sample benchmark lists by stratum and estimate full-suite results.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sample_parser = commands.add_parser("sample", help="Write a stratified subset of a benchmark list")
+    sample_parser.add_argument("input_file", help="Path to file containing full benchmark paths")
+    sample_parser.add_argument("output_file", help="Path of the subset; its weights go next to it (.weights.csv)")
+    sample_parser.add_argument("--count", "-n", type=int, required=True, help="Number of benchmarks to sample")
+    sample_parser.add_argument("--seed", type=int, default=0, help="Seed of the random generator")
+    sample_parser.add_argument("--history_dir", type=str, default=HISTORY_DIR,
+                               help="Data directory with earlier runs to classify the difficulty from")
+    sample_parser.add_argument("--timeout", "-t", type=int, default=1200,
+                               help="Timeout (in seconds) of the earlier runs")
+
+    estimate_parser = commands.add_parser("estimate", help="Extrapolate the results of a run on a subset")
+    estimate_parser.add_argument("list_file", help="Subset written by the sample command")
+    estimate_parser.add_argument("data_dir", help="Data directory of the run on the subset (e.g. data/brief/SMT-LIB)")
+    estimate_parser.add_argument("--output", type=str, default=None, help="Also save the estimates as a LaTeX table")
+
+    args = parser.parse_args()
+    if args.command == "sample":
+        paths = read_benchmarks(args.input_file)
+        picked = sample(paths, args.count, args.seed, load_difficulty(args.history_dir, args.timeout))
+        os.makedirs(os.path.dirname(os.path.abspath(args.output_file)), exist_ok=True)
+        with open(args.output_file, 'w') as f:
+            f.writelines(path + "\n" for path in picked["path"])
+        picked.drop(columns="path").to_csv(weights_file(args.output_file), index=False)
+        print(f"Sampled {len(picked)} of {len(paths)} benchmarks into {args.output_file}")
+        print(picked.groupby("difficulty")["weight"].agg(["size", "sum"])
+              .rename(columns={"size": "sampled", "sum": "stands for"}).to_string())
+    else:
+        weights = pd.read_csv(weights_file(args.list_file), keep_default_na=False)
+        table = estimate(weights, load_runs(os.path.join(args.data_dir, "*.csv")),
+                         os.path.basename(os.path.normpath(args.data_dir)))
+        total = round(weights["weight"].sum())
+        print(f"Estimates for all {total} benchmarks from {len(weights)} sampled (95% confidence):")
+        print(table.to_string(index=False).replace("$\\pm$", "+-"))
+        if args.output:
+            save_table_to_latex(table, total, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -3,28 +3,49 @@ import matplotlib.pyplot as plt
 import argparse
 import os
 
-def load_csv(file):
-    """Load CSV and determine its format."""
-    df = pd.read_csv(file)
-
-    # Drop first 5 components of the path in the benchmark
-    df['benchmark'] = df['benchmark'].apply(lambda x: '/'.join(x.split('/')[8:]) if '/' in x else x)
+from results_store import CHECK_PHASES, load_run
 
-    if 'check' in df.columns:
-        df['total_check_time'] = df['check']
-    elif 'kernel' in df.columns:
-        df['total_check_time'] = df[['load', 'reconstruct', 'kernel']].sum(axis=1, skipna=False)
-    else:
+def load_csv(file):
+    """Load a run and compute its total checking time."""
+    df, kind = load_run(file)
+    if kind == "solve":
         raise ValueError(f"Invalid CSV format for {file}")
-    return df[['benchmark', 'total_check_time']].sort_values(by='benchmark')
+    return check_times(df, kind)
+
+def check_times(df, kind):
+    """
+    Compute the total checking time of an already loaded run, and for runs
+    made with --repeat also with the phases at their first and third quartile.
+    """
+    df = df.copy()
+    # A benchmark without one of the checking phases has no checking time
+    df['total_check_time'] = df[CHECK_PHASES[kind]].sum(axis=1, skipna=False).astype(float)
+    columns = ['benchmark', 'total_check_time']
+    if 'repeats' in df.columns:
+        for quartile in ["q1", "q3"]:
+            phases = [f"{phase}_{quartile}" for phase in CHECK_PHASES[kind]]
+            df[f"check_time_{quartile}"] = df[phases].sum(axis=1, skipna=False).astype(float)
+            columns.append(f"check_time_{quartile}")
+    return df[columns].sort_values(by='benchmark')
 
 def plot_scatter(csv1, csv2, output_file):
     """Generate scatter plot comparing total checking times."""
-    df1 = load_csv(csv1)
-    df2 = load_csv(csv2)
+    plot_check_times(load_csv(csv1), load_csv(csv2), output_file)
+
+def quartile_errors(merged, suffix):
+    """Distances from the checking times of a run to their quartiles, if it was made with --repeat."""
+    if f'check_time_q1{suffix}' not in merged.columns:
+        return None
+    median = merged[f'total_check_time{suffix}']
+    return [(median - merged[f'check_time_q1{suffix}']).clip(lower=0),
+            (merged[f'check_time_q3{suffix}'] - median).clip(lower=0)]
 
+def plot_check_times(df1, df2, output_file):
+    """Generate the scatter plot from two frames computed by check_times."""
     # Merge on benchmark
-    merged = pd.merge(df1, df2, on='benchmark', suffixes=('_1', '_2'))
+    merged = pd.merge(df1.rename(columns=lambda column: column if column == 'benchmark' else column + '_1'),
+                      df2.rename(columns=lambda column: column if column == 'benchmark' else column + '_2'),
+                      on='benchmark')
 
     # Determine axis limits
     min_val = min(merged['total_check_time_1'].min(), merged['total_check_time_2'].min())
@@ -33,6 +54,12 @@ def plot_scatter(csv1, csv2, output_file):
     # Scatter plot
     plt.figure(figsize=(6, 6))
     plt.scatter(merged['total_check_time_1'], merged['total_check_time_2'], alpha=0.7)
+
+    # Error bars from the first to the third quartile of runs made with --repeat
+    xerr, yerr = quartile_errors(merged, '_1'), quartile_errors(merged, '_2')
+    if xerr is not None or yerr is not None:
+        plt.errorbar(merged['total_check_time_1'], merged['total_check_time_2'], xerr=xerr, yerr=yerr,
+                     fmt='none', ecolor='gray', alpha=0.5, linewidth=0.5)
     plt.plot([min_val, max_val], [min_val, max_val], 'r--', label='y = x')
 
     plt.xscale('log')
@@ -0,0 +1,90 @@
+"""Longest-expected-first ordering of benchmarks for run_benchmarks.py.
+
+The cost of a benchmark is predicted from earlier runs of the same solver in
+a data directory (data/all by default): the sum of its phase timings, or the
+timeout if it did not reach its last phase. Benchmarks without history are
+predicted from their file size, times the median time per byte of the solver
+on the same SMT-LIB logic (or Seventeen suite). Running the longest benchmarks
+first keeps them from ending up at the tail of a run, where they would leave
+the other workers idle.
+"""
+
+import glob
+import heapq
+import os
+import statistics
+from pathlib import Path
+
+HISTORY_DIR = "/home/user/artifact/data/all"
+
+def benchmark_key(path, root):
+    """The path of a benchmark relative to the benchmark root, e.g. SMT-LIB/non-incremental/QF_UF/f/x.smt2."""
+    try:
+        return str(Path(path).relative_to(root))
+    except ValueError:
+        return path
+
+def path_groups(key):
+    """SMT-LIB logic and family (or Seventeen module) of a benchmark key, as in results_store.py."""
+    parts = key.split("/")[1:] + ["", "", ""]
+    if parts[0] == "non-incremental":
+        return parts[1], parts[2]
+    if parts[0] == "baseline_probs":
+        return "", parts[2]
+    return "", ""
+
+def cost_group(key):
+    """SMT-LIB logic or Seventeen suite of a benchmark key."""
+    parts = key.split("/")
+    if len(parts) > 2 and parts[1] == "non-incremental":
+        return f"{parts[0]}/{parts[2]}"
+    return parts[0]
+
+def load_history(history_dir, solver, timeout_ms):
+    """Map the key of every benchmark the solver ran before to its cost in milliseconds."""
+    # Only here, so that importing the key helpers above needs no pandas or pyarrow
+    from results_store import PHASES, load_run, total_time
+    costs = {}
+    for csv_file in glob.glob(os.path.join(history_dir, "*", solver + ".csv")):
+        suite = os.path.basename(os.path.dirname(csv_file))
+        df, kind = load_run(csv_file)
+        finished = df[PHASES[kind][-1]].notna()
+        time = total_time(df, kind, PHASES).astype(float).where(finished, timeout_ms).clip(upper=timeout_ms)
+        costs.update(zip(suite + "/" + df['benchmark'].astype(str), time))
+    return costs
+
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def predict_costs(paths, solver, root, timeout, history_dir=HISTORY_DIR):
+    """Predict the cost in milliseconds of running the solver on each benchmark path."""
+    history = load_history(history_dir, solver, timeout * 1000)
+    keys = {path: benchmark_key(path, root) for path in paths}
+    sizes = {path: file_size(path) for path in paths}
+
+    # Time per byte, from the benchmarks that have both history and a file
+    rates = {}
+    for path, key in keys.items():
+        if key in history and sizes[path]:
+            rates.setdefault(cost_group(key), []).append(history[key] / sizes[path])
+    all_rates = [rate for group in rates.values() for rate in group]
+    default_rate = statistics.median(all_rates) if all_rates else 1.0
+    rates = {group: statistics.median(group_rates) for group, group_rates in rates.items()}
+
+    costs = {}
+    for path, key in keys.items():
+        if key in history:
+            costs[path] = history[key]
+        else:
+            costs[path] = min(sizes[path] * rates.get(cost_group(key), default_rate), timeout * 1000)
+    return costs
+
+def makespan(costs, jobs):
+    """Finish time of the last worker when jobs workers take the costs in order."""
+    workers = [0.0] * jobs
+    for cost in costs:
+        heapq.heapreplace(workers, workers[0] + cost)
+    return max(workers)
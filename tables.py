@@ -1,55 +1,31 @@
 import pandas as pd
-import glob
 import os
 import argparse
 
+from results_index import group_values, index_runs, summary_table, timeout_sweep
+from results_store import load_runs
+
 def load_and_process_table_data(file_pattern, benchmark_filter=None):
     """
-    Load and process CSV files matching the file pattern.
+    Load and process the runs whose CSV files match the file pattern.
     Generate a summary table for `unsat` results with required columns.
     Optionally filter benchmarks by a name prefix.
     """
-    table_data = []
-    total = None  # To store the total benchmarks (same for all checkers)
-
-    for file in glob.glob(file_pattern):
-        df = pd.read_csv(file)
-        checker_name = file.split('/')[-1].split('.')[0]  # Use file name as checker ID
-
-        # Apply benchmark filtering if specified
-        if benchmark_filter:
-            df = df[df['benchmark'].str.contains(benchmark_filter)]
-
-        # Identify `unsat` results based on the given conditions
-        if 'check' in df.columns:
-            df['is_unsat'] = (
-                (df['result'] == 'unsat') | (df['holes'] == 1) |
-                (df['result'].isna() & df['solve'].notna() & df['check'].isna())
-            )
-            checked = df[(df['is_unsat']) & (df['check'].notna())].shape[0]
-            checked_no_holes = df[(df['is_unsat']) & (df['check'].notna()) & (df['holes'].isna())].shape[0]
-        elif 'kernel' in df.columns:
-            df['is_unsat'] = df['load'].notna()
-            checked = df[(df['is_unsat']) & (df['kernel'].notna())].shape[0]
-            checked_no_holes = df[(df['is_unsat']) & (df['kernel'].notna()) & (df['holes'].isna())].shape[0]
-        else:
-            df['is_unsat'] = df['solve'].notna()
-            checked = df[(df['is_unsat']) & (df['solve'].notna())].shape[0]
-            checked_no_holes = df[(df['is_unsat']) & (df['solve'].notna()) & (df['holes'].isna())].shape[0]
-
-        solved = df['is_unsat'].sum()
+    return summary_table(index_runs(load_runs(file_pattern)), benchmark_filter=benchmark_filter)
 
-        if total is None:
-            total = df.shape[0]
-
-        table_data.append({
-            "Solver+Checker": checker_name,
-            "Solved": solved,
-            "Checked": checked,
-            "Checked (no holes)": checked_no_holes
-        })
-
-    return pd.DataFrame(table_data), total
+def logic_breakdown(indexes, benchmark_filter=None, timeout=None):
+    """
+    Generate the summary table for each SMT-LIB logic, with the logic and its
+    number of benchmarks in front of every row.
+    """
+    tables = []
+    for logic in group_values(indexes, "logic"):
+        table, total = summary_table(indexes, "logic", logic, benchmark_filter, timeout)
+        if total:
+            table.insert(0, "Total", total)
+            table.insert(0, "Logic", logic)
+            tables.append(table)
+    return pd.concat(tables, ignore_index=True)
 
 def save_table_to_latex(table, total, output_file):
     """
@@ -69,11 +45,23 @@ if __name__ == "__main__":
     parser.add_argument("data_dir", type=str, help="Path to the directory containing data files.")
     parser.add_argument("output_file", type=str, help="Path to the output LaTeX file.")
     parser.add_argument("--benchmark_filter", type=str, default=None, help="Prefix to filter benchmarks within the data (e.g., QF_ for quantifier-free benchmarks).")
+    parser.add_argument("--by_logic", action="store_true", help="Break the table down by SMT-LIB logic.")
+    parser.add_argument("--timeout", type=float, nargs="+", default=None,
+                        help="Virtual timeout(s) in seconds, shorter than the one of the runs. "
+                             "With several, the table has a row per timeout and solver.")
     args = parser.parse_args()
+    if args.by_logic and args.timeout and len(args.timeout) > 1:
+        parser.error("--by_logic takes a single --timeout")
 
     # Load and process the data
     file_pattern = os.path.join(args.data_dir, "*.csv")
-    table_data, total = load_and_process_table_data(file_pattern, args.benchmark_filter)
+    indexes = index_runs(load_runs(file_pattern))
+    timeout = args.timeout[0] if args.timeout else None
+    table_data, total = summary_table(indexes, benchmark_filter=args.benchmark_filter, timeout=timeout)
+    if args.by_logic:
+        table_data = logic_breakdown(indexes, args.benchmark_filter, timeout)
+    elif args.timeout and len(args.timeout) > 1:
+        table_data, total = timeout_sweep(indexes, args.timeout, benchmark_filter=args.benchmark_filter)
 
     # Save the table to a LaTeX file
     save_table_to_latex(table_data, total, args.output_file)
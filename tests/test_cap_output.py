@@ -0,0 +1,40 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_benchmarks import cap_output
+
+def write_log(path, lines):
+    data = b"".join(f"line {i:03} xxxxxxxxxxx\n".encode() for i in range(lines)) + b"[time] exit: 1234\n"
+    path.write_bytes(data)
+    return data
+
+def test_short_gap(tmp_path):
+    # The omitted gap is shorter than the marker line
+    log = tmp_path / "x.stdout"
+    data = write_log(log, 14)
+    cap_output(log, len(data) - 10)
+    out = log.read_bytes()
+    assert len(out) <= len(data) - 10
+    assert out.startswith(b"line 000 xxxxxxxxxxx\n")
+    assert out.endswith(b"[time] exit: 1234\n")
+    head, marker, tail = out.partition(b"[... ")
+    assert marker and data.startswith(head) and data.endswith(tail.split(b"...]\n", 1)[1])
+
+def test_long_gap(tmp_path):
+    log = tmp_path / "x.stdout"
+    data = write_log(log, 10000)
+    cap_output(log, 4096)
+    out = log.read_bytes()
+    assert len(out) <= 4096
+    head, _, rest = out.partition(b"[... ")
+    count, _, tail = rest.partition(b" bytes of output omitted ...]\n")
+    assert len(head) + int(count) + len(tail) == len(data)
+    assert data.startswith(head) and data.endswith(tail)
+
+def test_under_cap(tmp_path):
+    log = tmp_path / "x.stdout"
+    data = write_log(log, 14)
+    cap_output(log, len(data))
+    assert log.read_bytes() == data
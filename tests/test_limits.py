@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from limits import run_limited
+
+def run(tmp_path, script, timeout=10):
+    # Readable, as run_benchmarks.open_output opens them, for the rlimit MEMOUT check
+    with open(tmp_path / "out", "w+b") as out, open(tmp_path / "err", "w+b") as err:
+        return run_limited(["/bin/sh", "-c", script], timeout, 4096, out.fileno(), err.fileno())
+
+def test_exit_code(tmp_path):
+    code, usage = run(tmp_path, "exit 3")
+    assert code == 3
+    assert {"peak_rss_mb", "cpu_time", "wall_time"} <= usage.keys()
+
+def test_timeout(tmp_path):
+    code, usage = run(tmp_path, "sleep 5", timeout=0.5)
+    assert code == "TIMEOUT"
+    assert usage["wall_time"] < 4
+
+def test_cpu_limit(tmp_path):
+    code, _ = run(tmp_path, "kill -XCPU $$")
+    assert code == "TIMEOUT"
+
+def test_cpu_limit_in_wrapper(tmp_path):
+    # A wrapper passes on the status of a phase that RLIMIT_CPU killed
+    code, _ = run(tmp_path, "/bin/sh -c 'kill -XCPU $$'; exit $?")
+    assert code == "TIMEOUT"
+
+@pytest.mark.parametrize("message", ["std::bad_alloc", "Out of memory", "MemoryError"])
+def test_memout(tmp_path, message):
+    code, _ = run(tmp_path, f"echo '{message}' >&2; exit 1")
+    assert code == "MEMOUT"
+
+def test_oom_message_with_success(tmp_path):
+    # A solver that mentions the message but succeeds did not run out of memory
+    code, _ = run(tmp_path, "echo 'Out of memory' >&2; exit 0")
+    assert code == 0
+
+def test_failure_without_oom_message(tmp_path):
+    code, _ = run(tmp_path, "echo 'parse error' >&2; exit 1")
+    assert code == 1
@@ -0,0 +1,72 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_cache import ResultCache, tool_digest
+
+MB = 1024 * 1024
+
+def make_outputs(tmp_path, name, size=0):
+    stdout, stderr = tmp_path / f"{name}.stdout", tmp_path / f"{name}.stderr"
+    stdout.write_bytes(b"unsat\n" + b"x" * size)
+    stderr.write_bytes(b"")
+    return stdout, stderr
+
+def test_key(tmp_path):
+    bench = tmp_path / "x.smt2"
+    bench.write_text("(check-sat)\n")
+    cache = ResultCache(tmp_path / "cache", "tools")
+    key = cache.key(bench, 60, 1024)
+    assert key == ResultCache(tmp_path / "cache", "tools").key(bench, 60, 1024)
+    assert key != cache.key(bench, 61, 1024)
+    assert key != cache.key(bench, 60, 2048)
+    assert key != ResultCache(tmp_path / "cache", "other tools").key(bench, 60, 1024)
+    bench.write_text("(check-sat)\n(exit)\n")
+    assert key != cache.key(bench, 60, 1024)
+
+def test_tool_digest(tmp_path):
+    binary = tmp_path / "checker"
+    binary.write_bytes(b"v1")
+    digest = tool_digest("duper", [str(binary)])
+    assert digest == tool_digest("duper", [str(binary)])
+    assert digest != tool_digest("cvc5+ethos", [str(binary)])
+    binary.write_bytes(b"v2")
+    assert digest != tool_digest("duper", [str(binary)])
+    # A missing file counts by its name
+    assert tool_digest("duper", [str(tmp_path / "a")]) != tool_digest("duper", [str(tmp_path / "b")])
+
+def test_put_get(tmp_path):
+    cache = ResultCache(tmp_path / "cache", "tools")
+    stdout, stderr = make_outputs(tmp_path, "run")
+    cache.put("ab12", 0, stdout, stderr, {"wall_time": 1.5})
+    out, err = tmp_path / "copy.stdout", tmp_path / "copy.stderr"
+    assert cache.get("ab12", out, err) == (0, {"wall_time": 1.5})
+    assert out.read_bytes() == b"unsat\n"
+    # Another worker storing the same key keeps the first result
+    cache.put("ab12", "TIMEOUT", stdout, stderr, {})
+    assert cache.get("ab12", out, err) == (0, {"wall_time": 1.5})
+    cache.discard("ab12")
+    assert cache.get("ab12", out, err) is None
+
+def test_uncacheable(tmp_path):
+    cache = ResultCache(tmp_path / "cache", "tools")
+    stdout, stderr = make_outputs(tmp_path, "run")
+    cache.put("cd34", "ERROR", stdout, stderr, {})
+    assert cache.get("cd34", tmp_path / "o", tmp_path / "e") is None
+    cache.put("cd34", "TIMEOUT", stdout, stderr, {})
+    assert cache.get("cd34", tmp_path / "o", tmp_path / "e") == ("TIMEOUT", {})
+
+def test_evict_least_recently_used(tmp_path):
+    cache = ResultCache(tmp_path / "cache", "tools")
+    for i, key in enumerate(["aa01", "bb02", "cc03"]):
+        stdout, stderr = make_outputs(tmp_path, key, size=MB // 2)
+        cache.put(key, 0, stdout, stderr, {})
+        os.utime(cache.entry(key) / "meta.json", (1000 + i, 1000 + i))
+    # Reading aa01 makes bb02 the least recently used entry
+    assert cache.get("aa01", tmp_path / "o", tmp_path / "e") is not None
+    assert cache.evict(0.6) == 2
+    assert cache.entry("aa01").exists()
+    assert not cache.entry("bb02").exists() and not cache.entry("cc03").exists()
+    assert not cache.entry("bb02").parent.exists()
+    assert cache.evict(0.6) == 0
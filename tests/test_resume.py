@@ -0,0 +1,56 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import run_benchmarks
+from run_benchmarks import load_journal, pending_benchmarks, terminate_last_line
+
+def write_journal(path, records, torn=""):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records) + torn)
+
+def test_last_result_wins(tmp_path):
+    journal = tmp_path / "duper.jsonl"
+    write_journal(journal, [
+        {"solver": "duper", "benchmark": "/b/x", "result": "TIMEOUT"},
+        {"solver": "duper", "benchmark": "/b/y", "result": 0},
+        {"solver": "cvc5+ethos", "benchmark": "/b/z", "result": 0},
+        {"solver": "duper", "benchmark": "/b/x", "result": 0},
+    ], torn='{"solver": "duper", "benchmark": "/b/')
+    assert load_journal(journal, "duper") == {"/b/x": 0, "/b/y": 0}
+
+def test_missing_journal(tmp_path):
+    assert load_journal(tmp_path / "none.jsonl", "duper") == {}
+
+def test_pending_from_journal(tmp_path):
+    journal = tmp_path / "duper.jsonl"
+    write_journal(journal, [
+        {"solver": "duper", "benchmark": "/b/done", "result": 1},
+        {"solver": "duper", "benchmark": "/b/timeout", "result": "TIMEOUT"},
+        {"solver": "duper", "benchmark": "/b/error", "result": "ERROR"},
+        {"solver": "duper", "benchmark": "/b/memout", "result": "MEMOUT"},
+    ])
+    paths = ["/b/done", "/b/timeout", "/b/new", "/b/error", "/b/memout"]
+    assert pending_benchmarks(paths, "duper", tmp_path, journal, False) == ["/b/new"]
+    assert pending_benchmarks(paths, "duper", tmp_path, journal, True) == ["/b/timeout", "/b/new", "/b/error"]
+
+def test_pending_from_output_files(tmp_path, monkeypatch):
+    # Without a journal, a benchmark is done once its .stdout file exists
+    monkeypatch.setattr(run_benchmarks, "BENCHMARK_ROOT", tmp_path / "benchmarks")
+    paths = [str(tmp_path / "benchmarks" / "SMT-LIB" / name) for name in ("a.smt2", "b.smt2")]
+    out_dir = tmp_path / "output"
+    done = out_dir / "duper" / "SMT-LIB" / "a.smt2.stdout"
+    done.parent.mkdir(parents=True)
+    done.write_text("unsat\n")
+    assert pending_benchmarks(paths, "duper", out_dir, tmp_path / "duper.jsonl", False) == paths[1:]
+
+def test_terminate_torn_line(tmp_path):
+    journal = tmp_path / "duper.jsonl"
+    write_journal(journal, [{"solver": "duper", "benchmark": "/b/x", "result": 0}], torn='{"solver"')
+    terminate_last_line(journal)
+    with open(journal, 'a') as f:
+        f.write(json.dumps({"solver": "duper", "benchmark": "/b/y", "result": 0}) + "\n")
+    assert load_journal(journal, "duper") == {"/b/x": 0, "/b/y": 0}
+    terminate_last_line(journal)
+    assert journal.read_text().endswith("}\n")
@@ -0,0 +1,71 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from results_store import load_run
+from run_benchmarks import BENCHMARK_ROOT
+from sample_benchmarks import sample, estimate
+
+def benchmark_paths(count):
+    return [str(BENCHMARK_ROOT / f"SMT-LIB/non-incremental/QF_{'UF' if i % 2 else 'LRA'}/f{i % 5}/b{i}.smt2")
+            for i in range(count)]
+
+def difficulty(paths):
+    # A fifth of the benchmarks are hard, the others easy
+    return {os.path.relpath(path, BENCHMARK_ROOT): "hard" if i % 5 == 0 else "easy" for i, path in enumerate(paths)}
+
+def test_sample_is_seeded_and_stratified():
+    paths = benchmark_paths(100)
+    picked = sample(paths, 10, 7, difficulty(paths))
+    assert picked["path"].tolist() == sample(paths, 10, 7, difficulty(paths))["path"].tolist()
+    assert picked["path"].tolist() != sample(paths, 10, 8, difficulty(paths))["path"].tolist()
+    assert len(picked) == 10 and picked["path"].is_unique
+    assert picked.groupby("difficulty").size().to_dict() == {"easy": 8, "hard": 2}
+    # Each class stands for all of its benchmarks
+    assert picked.groupby("difficulty")["weight"].sum().to_dict() == {"easy": 80, "hard": 20}
+    assert picked.index.is_monotonic_increasing
+
+def test_sample_keeps_small_classes():
+    paths = benchmark_paths(100)
+    classes = {key: "easy" for key in difficulty(paths)}
+    classes[os.path.relpath(paths[3], BENCHMARK_ROOT)] = "hard"
+    picked = sample(paths, 5, 0, classes)
+    assert picked.groupby("difficulty").size().to_dict() == {"easy": 4, "hard": 1}
+
+def test_sample_whole_list():
+    paths = benchmark_paths(4)
+    picked = sample(paths, 10, 0, {})
+    assert picked["path"].tolist() == paths and (picked["weight"] == 1).all()
+
+def run(tmp_path, checked):
+    """A cvc5+ethos run on the benchmarks, checking those in checked in 2 s each."""
+    rows = ["benchmark,result,holes,solve,check"]
+    for key in checked:
+        rows.append(f"/out/cvc5+ethos/SMT-LIB/{key.split('/', 1)[1]}.stdout,unsat,,1000,1000")
+    csv_file = tmp_path / "cvc5+ethos.csv"
+    csv_file.write_text("\n".join(rows) + "\n")
+    return {"cvc5+ethos": load_run(str(csv_file))}
+
+def test_estimate_census_is_exact(tmp_path):
+    paths = benchmark_paths(6)
+    weights = sample(paths, 6, 0, difficulty(paths))[["benchmark", "difficulty", "weight"]]
+    table = estimate(weights, run(tmp_path, weights["benchmark"][:4]), "SMT-LIB")
+    row = table.iloc[0]
+    assert row["Solver+Checker"] == "cvc5+ethos"
+    assert row["Solved"] == "4 $\\pm$ 0"
+    assert row["Time (s)"] == "8 $\\pm$ 0"
+
+def test_estimate_extrapolates(tmp_path):
+    weights = pd.DataFrame({
+        "benchmark": [f"SMT-LIB/non-incremental/QF_UF/f/b{i}.smt2" for i in range(4)],
+        "difficulty": ["easy", "easy", "hard", "hard"],
+        "weight": [10.0, 10.0, 5.0, 5.0],
+    })
+    table = estimate(weights, run(tmp_path, weights["benchmark"][[0, 2, 3]]), "SMT-LIB")
+    solved, _, half_width = table.iloc[0]["Solved"].partition(" $\\pm$ ")
+    assert solved == "20"
+    # Only the easy class, with one of its two samples solved, is uncertain
+    assert 0 < float(half_width) < 20
@@ -0,0 +1,23 @@
+import argparse
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run_benchmarks import parse_solver_limits
+
+def test_all_fields():
+    assert parse_solver_limits("verit+sledgehammer:1200:16384:1") == \
+        ("verit+sledgehammer", {"timeout": 1200, "memout": 16384, "jobs": 1})
+
+def test_empty_fields_keep_global_setting():
+    assert parse_solver_limits("duper:300") == ("duper", {"timeout": 300})
+    assert parse_solver_limits("duper::2048") == ("duper", {"memout": 2048})
+    assert parse_solver_limits("cvc5+ethos:::4") == ("cvc5+ethos", {"jobs": 4})
+
+@pytest.mark.parametrize("spec", ["z3:60", "duper", "duper:1:2:3:4", "duper:sixty"])
+def test_invalid(spec):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_solver_limits(spec)
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from results_index import RunIndex
+from results_store import load_run
+
+PREFIX = "/home/user/artifact/output/all/cvc5+leansmt-compiler/SMT-LIB/non-incremental"
+
+# Solved at 300 ms and done at its exit at 1200 ms; solved at 3000 ms and done
+# at 5000 ms; solved at 3500 ms but not checked
+ROWS = f"""benchmark,result,holes,solve,load,reconstruct,kernel,exit
+{PREFIX}/QF_UF/f/a.smt2.stdout,unsat,,100,200,300,400,1200
+{PREFIX}/QF_UF/f/b.smt2.stdout,unsat,,2000,1000,1000,1000,5000
+{PREFIX}/QF_LRA/g/c.smt2.stdout,,,3000,500,,,
+"""
+
+def run_index(tmp_path):
+    csv_file = tmp_path / "cvc5+leansmt-compiler.csv"
+    csv_file.write_text(ROWS)
+    return RunIndex(*load_run(str(csv_file)))
+
+def test_sweep(tmp_path):
+    index = run_index(tmp_path)
+    solved, checked, checked_no_holes = index.sweep(index.rows(), [0.5, 1, 1.2, 3.5, 5, 100])
+    assert solved.tolist() == [1, 1, 1, 3, 3, 3]
+    assert checked.tolist() == [0, 0, 1, 1, 2, 2]
+    assert checked_no_holes.tolist() == checked.tolist()
+
+def test_counts_beyond_run_timeout(tmp_path):
+    index = run_index(tmp_path)
+    assert index.counts(index.rows()) == (3, 2, 2)
+    assert index.counts(index.rows(), timeout=100) == (3, 2, 2)
+    assert index.counts(index.rows(), timeout=3) == (2, 1, 1)
+    assert index.counts(index.rows("logic", "QF_LRA"), timeout=3) == (0, 0, 0)
+
+def test_cactus_curve(tmp_path):
+    index = run_index(tmp_path)
+    assert np.allclose(index.cactus_curve(index.rows(), timeout=1.2), [0.8])
+    assert np.allclose(index.cactus_curve(index.rows(), timeout=4.9), [0.8])
+    assert np.allclose(index.cactus_curve(index.rows()), [0.8, 4.8])
@@ -1,12 +1,106 @@
 #!/bin/bash
 
-if [ "$#" -ne 2 ]; then
-    echo "Usage: $0 <output_dir> <path/to/file.smt_in>"
+if [ "$#" -lt 2 ]; then
+    echo "Usage: $0 <output_dir> <path/to/file.smt_in> [<path/to/file.smt_in> ...]"
     exit 1
 fi
 
 out_dir="$1"
-input_file="$2"
+shift
+
+SLEDGEHAMMER_OPTIONS="sledgehammer[provers=verit,fact_filter=mepo,minimize=false,max_facts=512,induction_rules=exclude,uncurried_aliases=false,lam_trans=lifting,max_mono_iters=3,max_new_mono_instances=100,timeout=1200,preplay_timeout=1200,check_trivial=true,keep_probs=true,keep_proofs=true,isar_proofs=false,try0=false,slice=false,proof_method=smt]"
+
+# Several benchmarks of one theory (run_benchmarks.py groups them): check all
+# their goals in one Mirabelle session, so that the session is loaded once,
+# then split its log into the mirabelle.log of each benchmark
+if [ "$#" -gt 1 ]; then
+    module="$(basename "$(dirname "$(dirname "$1")")")"
+    test_name="$(basename "$(dirname "$1")" | sed 's/^[0-9]\+_//')"
+    theory_dir="$out_dir/verit+sledgehammer/$(dirname "${1#/home/user/artifact/benchmarks/}")"
+    mkdir -p "$theory_dir"
+    batch_dir="$(mktemp -d "$theory_dir/mirabelle-batch.XXXXXX")"
+
+    # The goal of prob_00087_002136__8477998 is at position 87:2136 (line and
+    # offset, as in the Mirabelle log); restrict each -T target to its line (a
+    # single benchmark restricts to lines 87-2136 and has Mirabelle stop after
+    # the first goal, which is the same one). Goals on the same line share a
+    # target.
+    targets=()
+    goals=""
+    for input_file in "$@"; do
+        position="$(basename "$input_file" .smt_in | sed 's/^prob_//; s/__.*//')"
+        line=$((10#${position%%_*}))
+        offset=$((10#${position#*_}))
+        output_dir="$out_dir/verit+sledgehammer/${input_file#/home/user/artifact/benchmarks/}"
+        mkdir -p "$output_dir/mirabelle"
+        : > "$output_dir/mirabelle/mirabelle.log"
+        case " ${targets[*]} " in
+            *" ${test_name}[${line}:${line}] "*) ;;
+            *) targets+=(-T "${test_name}[${line}:${line}]") ;;
+        esac
+        goals+="$line $offset $output_dir/mirabelle/mirabelle.log"$'\n'
+    done
+
+    echo "module: $module"
+    echo "test_with_lines: ${targets[*]}"
+
+    # run_benchmarks.py gives the session the timeout of all its goals
+    # together and each goal its own timeout (ARTIFACT_GOAL_TIMEOUT), so that
+    # a slow goal cannot take the time of the others
+    cd "$batch_dir"
+    isabelle mirabelle \
+      -d '$AFP' \
+      -m "$#" \
+      -t "${ARTIFACT_GOAL_TIMEOUT:-1200}" \
+      -A "$SLEDGEHAMMER_OPTIONS" \
+      "${targets[@]}" \
+      "$module"
+    status=$?
+
+    # Lines about a goal ("goal.<command> <theory> <line>:<offset> ...") of
+    # this theory go to the log of the benchmark at that position, the first
+    # one only. A goal whose offset matches no benchmark goes to the benchmark
+    # at its line if there is only one. The other lines go to every log.
+    awk -v goals="$goals" -v theory="$test_name" '
+        BEGIN {
+            n = split(goals, entries, "\n")
+            for (i = 1; i < n; i++) {
+                split(entries[i], fields, " ")
+                file = substr(entries[i], length(fields[1]) + length(fields[2]) + 3)
+                logs[file] = 1
+                at[fields[1] ":" fields[2]] = file
+                on_line[fields[1]] = file
+                count[fields[1]]++
+            }
+        }
+        {
+            goal = index($0, "goal.")
+            if (!goal) {
+                for (file in logs) print > file
+                next
+            }
+            split(substr($0, goal), words, " ")
+            if (words[2] != theory && substr(words[2], length(words[2]) - length(theory)) != "." theory)
+                next
+            if (!match(words[3], /^[0-9]+:[0-9]+/))
+                next
+            split(substr(words[3], 1, RLENGTH), position, ":")
+            key = (position[1] + 0) ":" (position[2] + 0)
+            if (key in at)
+                file = at[key]
+            else if (count[position[1] + 0] == 1)
+                file = on_line[position[1] + 0]
+            else
+                next
+            if (!(file in seen)) {
+                seen[file] = 1
+                print > file
+            }
+        }' "$batch_dir/mirabelle/mirabelle.log"
+    exit $status
+fi
+
+input_file="$1"
 
 # Extract "VeriComp" from the grandparent directory of the file
 module="$(basename "$(dirname "$(dirname "$input_file")")")"
@@ -46,6 +140,6 @@ isabelle mirabelle \
   -d '$AFP' \
   -m 1 \
   -t 1200 \
-  -A "sledgehammer[provers=verit,fact_filter=mepo,minimize=false,max_facts=512,induction_rules=exclude,uncurried_aliases=false,lam_trans=lifting,max_mono_iters=3,max_new_mono_instances=100,timeout=1200,preplay_timeout=1200,check_trivial=true,keep_probs=true,keep_proofs=true,isar_proofs=false,try0=false,slice=false,proof_method=smt]" \
+  -A "$SLEDGEHAMMER_OPTIONS" \
   -T "$test_with_lines" \
   "$module"
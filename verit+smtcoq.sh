@@ -2,27 +2,53 @@
 
 input_file="$1"
 
-# Temporary file for the proof
-proof_file=$(mktemp /tmp/proof.XXXXXX.vtlog)
+# Temporary file for the proof, in the directory run_benchmarks.py provides
+# (and removes after the run, even if it is killed)
+proof_dir="${ARTIFACT_PROOF_DIR:-/tmp}"
+proof_file=$(mktemp "$proof_dir/proof.XXXXXX.vtlog")
+trap 'rm -f "$proof_file"' EXIT
+
+# Profile records (run_benchmarks.py --profile) go to the log even from redirected phases
+exec 3>&1
+
+# Run a phase, through the profiler if profiling is enabled
+profile() {
+    local phase="$1"
+    shift
+    if [ -n "$ARTIFACT_PROFILE" ]; then
+        python3 /home/user/artifact/phase_profile.py run "$phase" "$@"
+    else
+        "$@"
+    fi
+}
 
 echo "Running veriT and producing proof"
 
 # Measure time for running veriT
 start_time=$(date +%s%3N)
-/home/user/artifact/veriT9f48a98/veriT --proof-prune --proof-merge --proof-with-sharing --cnf-definitional --disable-ackermann --proof=$proof_file $input_file
+profile solve /home/user/artifact/veriT9f48a98/veriT --proof-prune --proof-merge --proof-with-sharing --cnf-definitional --disable-ackermann --proof=$proof_file $input_file
+status=$?
 end_time=$(date +%s%3N)
 
 # Calculate and print the elapsed time for veriT
 verit_time=$((end_time - start_time))
 echo "[time] solve: $verit_time"
 
+[ -n "$ARTIFACT_PROFILE" ] && python3 /home/user/artifact/phase_profile.py proof "$proof_file"
+
 echo "Running smtcoq with proof"
 
 # Measure time for running smtcoq
 start_time=$(date +%s%3N)
-/home/user/artifact/smtcoq/src/extraction/smtcoq -verit $input_file $proof_file
+profile check /home/user/artifact/smtcoq/src/extraction/smtcoq -verit $input_file $proof_file
+check_status=$?
+[ "$status" -eq 0 ] && status=$check_status
 end_time=$(date +%s%3N)
 
 # Calculate and print the elapsed time for smtcoq
 smtcoq_time=$((end_time - start_time))
 echo "[time] check: $smtcoq_time"
+
+# Exit with the status of the first phase that failed, so that run_benchmarks.py
+# can tell a solver that ran out of memory under --limits rlimit
+exit $status
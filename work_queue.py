@@ -0,0 +1,285 @@
+"""Run benchmarks on several machines through a shared SQLite work queue.
+
+The queue is a SQLite file on storage all machines can reach. The coordinator
+submits (solver, benchmark) tasks to it; workers on any machine claim tasks,
+run them like run_benchmarks.py does, and store the result together with the
+stdout and stderr in the queue. The coordinator then collects the results into
+its output directory and <solver>.jsonl results files, so the collectors and
+--resume work on them as on a local run.
+
+A claimed task holds a lease that its worker renews while the task runs. If a
+worker dies, its lease runs out and the task is handed to the next worker that
+asks; after MAX_ATTEMPTS lost runs it is recorded as ERROR. A worker that
+loses the lease of its task, or exits (other than by SIGKILL), kills the
+solver it started, which runs in a session of its own.
+
+Usage:
+  python3 work_queue.py submit <queue> <input_file> <solver> [<solver> ...] [--timeout T] [--memout M]
+  python3 work_queue.py worker <queue> [--jobs J]
+  python3 work_queue.py collect <queue> [--output_dir DIR]
+  python3 work_queue.py status <queue>
+
+To try it on one machine, start several workers on the same queue file.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+import psutil
+
+from run_benchmarks import (SOLVER_COMMANDS, output_path, parse_solver_limits, read_benchmarks,
+                            resolve_limits, run_single_benchmark, terminate_last_line)
+
+# Seconds a claimed task stays with its worker without a renewal
+LEASE = 120
+
+# Runs of a task lost with their worker before it counts as an ERROR
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    solver TEXT NOT NULL,
+    benchmark TEXT NOT NULL,
+    timeout INTEGER NOT NULL,
+    memout INTEGER NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',  -- pending, running, done or collected
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    usage TEXT,
+    stdout BLOB,
+    stderr BLOB,
+    finished REAL,
+    UNIQUE (solver, benchmark)
+);
+CREATE INDEX IF NOT EXISTS tasks_by_status ON tasks (status, priority);
+"""
+
+def connect(queue_file):
+    # No WAL: its shared memory does not work over network file systems
+    db = sqlite3.connect(queue_file, timeout=300, isolation_level=None)
+    db.executescript(SCHEMA)
+    return db
+
+def submit(db, benchmark_paths, solvers, limits):
+    """Queue every (solver, benchmark) pair, benchmark by benchmark. Return the number of new tasks."""
+    before = db.total_changes
+    db.execute("BEGIN IMMEDIATE")
+    db.executemany(
+        "INSERT OR IGNORE INTO tasks (solver, benchmark, timeout, memout, priority) VALUES (?, ?, ?, ?, ?)",
+        [(solver, path, limits[solver]["timeout"], limits[solver]["memout"], i * len(solvers) + j)
+         for i, path in enumerate(benchmark_paths) for j, solver in enumerate(solvers)])
+    db.execute("COMMIT")
+    return db.total_changes - before
+
+def claim(db, worker):
+    """Take the next pending task, or one whose worker was lost. Return (id, solver, benchmark, timeout, memout)."""
+    now = time.time()
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        db.execute("UPDATE tasks SET status = 'done', result = '\"ERROR\"', usage = '{}', finished = ? "
+                   "WHERE status = 'running' AND lease_until < ? AND attempts >= ?", (now, now, MAX_ATTEMPTS))
+        task = db.execute("SELECT id, solver, benchmark, timeout, memout FROM tasks "
+                          "WHERE status = 'pending' OR (status = 'running' AND lease_until < ?) "
+                          "ORDER BY priority LIMIT 1", (now,)).fetchone()
+        if task is not None:
+            db.execute("UPDATE tasks SET status = 'running', worker = ?, lease_until = ?, attempts = attempts + 1 "
+                       "WHERE id = ?", (worker, now + LEASE, task[0]))
+        db.execute("COMMIT")
+    except BaseException:
+        db.execute("ROLLBACK")
+        raise
+    return task
+
+def kill_solvers():
+    """Kill the process group of every solver this worker started."""
+    for child in psutil.Process().children():
+        try:
+            os.killpg(child.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+def renew_lease(queue_file, task_id, worker, stop):
+    db = connect(queue_file)
+    try:
+        while not stop.wait(LEASE / 4):
+            renewed = db.execute("UPDATE tasks SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                                 (time.time() + LEASE, task_id, worker)).rowcount
+            if not renewed and not stop.is_set():
+                # Another worker took the task over, or it was given up: its result is not stored anyway
+                kill_solvers()
+                return
+    finally:
+        db.close()
+
+def exit_on_signal(signum, frame):
+    sys.exit(128 + signum)
+
+def run_task(task, limits, cgroup_root, proof_dir, max_output, scratch):
+    """Run a task with its output in the scratch directory. Return (code, usage, stdout, stderr)."""
+    _, solver, benchmark, timeout, memout = task
+    _, code, usage = run_single_benchmark(solver, timeout, memout, scratch, False, limits, cgroup_root, None,
+                                          proof_dir, max_output, benchmark)
+    output = []
+    try:
+        stdout_path = output_path(solver, benchmark, scratch)
+        for path in (stdout_path, stdout_path.with_suffix(".stderr")):
+            output.append(path.read_bytes())
+            path.unlink()
+    except (OSError, ValueError):
+        output = [b"", b""]
+    return code, usage, *output
+
+def work(queue_file, limits, cgroup_root, proof_dir, max_output):
+    """Claim and run tasks until none are pending or running."""
+    # Unwind on SIGTERM too, so that the solver of the current task is killed below
+    signal.signal(signal.SIGTERM, exit_on_signal)
+    db = connect(queue_file)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    scratch = tempfile.mkdtemp(prefix="worker-")
+    try:
+        while True:
+            task = claim(db, worker)
+            if task is None:
+                if db.execute("SELECT 1 FROM tasks WHERE status = 'running' LIMIT 1").fetchone() is None:
+                    return
+                time.sleep(LEASE / 4)  # Another worker may still be lost
+                continue
+
+            stop = threading.Event()
+            heartbeat = threading.Thread(target=renew_lease, args=(queue_file, task[0], worker, stop), daemon=True)
+            heartbeat.start()
+            try:
+                code, usage, stdout, stderr = run_task(task, limits, cgroup_root, proof_dir, max_output, scratch)
+            finally:
+                stop.set()
+                heartbeat.join()
+            # A worker that took over a task from this one, thought lost, may have finished it already
+            db.execute("UPDATE tasks SET status = 'done', result = ?, usage = ?, stdout = ?, stderr = ?, "
+                       "finished = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                       (json.dumps(code), json.dumps(usage), stdout, stderr, time.time(), task[0], worker))
+    finally:
+        kill_solvers()
+        shutil.rmtree(scratch, ignore_errors=True)
+        db.close()
+
+def collect(db, out_dir):
+    """
+    Write the output of the finished tasks to out_dir and append their
+    records to <out_dir>/<solver>.jsonl. Return the number of tasks collected.
+    """
+    journals = {}
+    count = 0
+    # The output of one task at a time, as all of it may not fit in memory
+    task_ids = [task_id for task_id, in db.execute("SELECT id FROM tasks WHERE status = 'done' ORDER BY finished")]
+    try:
+        for task_id in task_ids:
+            solver, benchmark, result, usage, stdout, stderr, finished = db.execute(
+                "SELECT solver, benchmark, result, usage, stdout, stderr, finished FROM tasks WHERE id = ?",
+                (task_id,)).fetchone()
+            try:
+                stdout_path = output_path(solver, benchmark, out_dir)
+                stdout_path.parent.mkdir(parents=True, exist_ok=True)
+                stdout_path.write_bytes(stdout or b"")
+                stdout_path.with_suffix(".stderr").write_bytes(stderr or b"")
+            except (OSError, ValueError) as e:
+                print(f"Failed to save output for {benchmark}: {e}", file=sys.stderr)
+            if solver not in journals:
+                results_file = os.path.join(out_dir, f"{solver}.jsonl")
+                os.makedirs(out_dir, exist_ok=True)
+                terminate_last_line(results_file)
+                journals[solver] = open(results_file, 'a', buffering=1)
+            record = {"solver": solver, "benchmark": benchmark, "result": json.loads(result), **json.loads(usage),
+                      "finished": finished}
+            journals[solver].write(json.dumps(record) + "\n")
+            db.execute("UPDATE tasks SET status = 'collected', stdout = NULL, stderr = NULL WHERE id = ?",
+                       (task_id,))
+            count += 1
+    finally:
+        for f_res in journals.values():
+            f_res.close()
+    return count
+
+def status(db):
+    return dict(db.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+
+def main():
+    parser = argparse.ArgumentParser(description="Run benchmarks on several machines through a shared SQLite queue.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit_parser = commands.add_parser("submit", help="Queue the benchmarks of a list for some solvers")
+    submit_parser.add_argument("queue", help="SQLite queue file on shared storage")
+    submit_parser.add_argument("input_file", help="Path to file containing full benchmark paths")
+    submit_parser.add_argument("solvers", nargs="+", metavar="solver",
+                               choices=[solver for solver in SOLVER_COMMANDS if solver != "verit+sledgehammer"],
+                               help="Solvers to use (not verit+sledgehammer, whose output stays on the worker)")
+    submit_parser.add_argument("--timeout", "-t", type=int, default=60, help="Timeout (in seconds) per benchmark")
+    submit_parser.add_argument("--memout", "-m", type=int, default=1024, help="Memory limit (in MB) per benchmark")
+    submit_parser.add_argument("--solver_limits", type=parse_solver_limits, action="append", default=[],
+                               metavar="SOLVER:TIMEOUT:MEMOUT", help="Timeout and memory limit of one solver")
+
+    worker_parser = commands.add_parser("worker", help="Run queued tasks until there are none left")
+    worker_parser.add_argument("queue", help="SQLite queue file on shared storage")
+    worker_parser.add_argument("--jobs", "-j", type=int, default=1, help="Number of tasks to run in parallel")
+    worker_parser.add_argument("--limits", choices=["auto", "cgroup", "rlimit", "psutil"], default="auto",
+                               help="How to enforce the limits (see run_benchmarks.py)")
+    worker_parser.add_argument("--cgroup_root", type=str, default=None,
+                               help="Delegated cgroup v2 directory for the cgroup backend (default: own cgroup)")
+    worker_parser.add_argument("--proof_dir", type=str, default=None,
+                               help="Directory for the proof files passed from solver to checker")
+    worker_parser.add_argument("--max_output", type=int, default=64,
+                               help="Size limit (in MB) of each stdout/stderr (0: no limit)")
+
+    collect_parser = commands.add_parser("collect", help="Write the finished tasks to an output directory")
+    collect_parser.add_argument("queue", help="SQLite queue file on shared storage")
+    collect_parser.add_argument("--output_dir", "-o", type=str, default="/home/user/artifact/output",
+                                help="Root directory for solver output")
+
+    status_parser = commands.add_parser("status", help="Count the tasks in each state")
+    status_parser.add_argument("queue", help="SQLite queue file on shared storage")
+
+    args = parser.parse_args()
+    if args.command == "submit":
+        solvers = list(dict.fromkeys(args.solvers))
+        solver_limits = dict(args.solver_limits)
+        limits = {solver: {"timeout": args.timeout, "memout": args.memout, **solver_limits.get(solver, {})}
+                  for solver in solvers}
+        added = submit(connect(args.queue), read_benchmarks(args.input_file), solvers, limits)
+        print(f"Queued {added} tasks in {args.queue}")
+    elif args.command == "worker":
+        limits, cgroup_root = resolve_limits(args.limits, args.cgroup_root)
+        workers = [multiprocessing.Process(target=work, args=(args.queue, limits, cgroup_root, args.proof_dir,
+                                                              args.max_output * 1024 * 1024))
+                   for _ in range(args.jobs)]
+        for process in workers:
+            process.start()
+        signal.signal(signal.SIGTERM, exit_on_signal)
+        try:
+            for process in workers:
+                process.join()
+        finally:
+            # Each worker kills its solver on SIGTERM
+            for process in workers:
+                if process.is_alive():
+                    process.terminate()
+    elif args.command == "collect":
+        print(f"Collected {collect(connect(args.queue), args.output_dir)} results into {args.output_dir}")
+    else:
+        for state, count in sorted(status(connect(args.queue)).items()):
+            print(f"{state}: {count}")
+
+if __name__ == "__main__":
+    main()